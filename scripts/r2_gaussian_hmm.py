@@ -1,14 +1,21 @@
 import os
 import copy
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 
-import cvxpy as cp
 from hmmlearn import hmm
+from hmmlearn.base import ConvergenceMonitor
 
-from scipy.stats import multivariate_normal
+from scipy.linalg import solve_triangular
+from scipy.optimize import linear_sum_assignment
+from scipy.special import logsumexp
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
+from sklearn.metrics import silhouette_score, pairwise_distances
 
 import sys
 python_path = os.path.abspath(os.path.join(__file__ ,"../.."))
@@ -21,19 +28,397 @@ from models.HMMs.base_hmm import BaseHMM
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
+# version of the array-only snapshot format written by R2GaussianHMM.to_arrays
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FIELDS = ("means", "covars", "transmat", "startprob", "scaler_mean", "scaler_scale", "remap")
+
+
+def _log_normalise(log_prior, log_b):
+    """
+    One filter step in log space: returns (fwd, log_c) with fwd = prior * b / c and
+    log_c = logsumexp(log_prior + log_b), so states with zero prior cannot drive c to 0.
+    """
+    log_alpha = log_prior + log_b
+    shift = log_alpha.max()
+    alpha = np.exp(log_alpha - shift)
+    c = alpha.sum()
+    return alpha / c, np.log(c) + shift
+
+
+def _forward_pass(framelogprob, startprob, transmat, init_fwd=None):
+    """
+    Scaled forward recursion, normalised in log space.
+    Returns (fwd, log_scale): fwd[t] is the normalised filtered state distribution and
+    log_scale[t] = log p(x_t | x_{<t}). If init_fwd is given, the chain continues from
+    that filtered distribution instead of starting from startprob.
+    """
+    n_samples, n_components = framelogprob.shape
+    fwd = np.empty((n_samples, n_components))
+    log_scale = np.empty(n_samples)
+    prior = startprob if init_fwd is None else init_fwd @ transmat
+    with np.errstate(divide="ignore"):
+        for t in range(n_samples):
+            fwd[t], log_scale[t] = _log_normalise(np.log(prior), framelogprob[t])
+            prior = fwd[t] @ transmat
+    return fwd, log_scale
+
+
+def _backward_pass(framelogprob, transmat, log_scale, fwd):
+    """
+    Scaled backward recursion matching the scaling constants of _forward_pass.
+    Returns (bwd, scaled_emission) where scaled_emission[t] = p(x_t | state) / c_t, set to 0
+    where fwd[t] is 0 (a zero predicted probability: every term it enters is multiplied by 0,
+    while the ratio itself can overflow).
+    """
+    n_samples, n_components = framelogprob.shape
+    with np.errstate(over="ignore"):
+        scaled_emission = np.where(fwd > 0, np.exp(framelogprob - log_scale[:, None]), 0.0)
+
+    bwd = np.empty((n_samples, n_components))
+    bwd[-1] = 1.0
+    for t in range(n_samples - 2, -1, -1):
+        bwd[t] = transmat @ (scaled_emission[t + 1] * bwd[t + 1])
+    return bwd, scaled_emission
+
+
+def _sqrtm_psd(covars):
+    """Batched symmetric square root of PSD matrices (..., d, d)."""
+    eigvals, eigvecs = np.linalg.eigh(covars)
+    return (eigvecs * np.sqrt(np.maximum(eigvals, 0))[..., None, :]) @ np.swapaxes(eigvecs, -1, -2)
+
+
+def _cholesky_factors(covars, min_covar: float=1e-7) -> tuple:
+    """
+    Lower Cholesky factors and log-determinants of covariance matrices (..., d, d).
+    Like hmmlearn, a matrix that is not numerically PD is retried with min_covar on its diagonal.
+    """
+    try:
+        chol = np.linalg.cholesky(covars)
+    except np.linalg.LinAlgError:
+        chol = np.linalg.cholesky(covars + min_covar * np.eye(covars.shape[-1]))
+    log_det = 2 * np.log(np.diagonal(chol, axis1=-2, axis2=-1)).sum(axis=-1)
+    return chol, log_det
+
+
+def _log_density_chol(X_, means, chol, log_det) -> np.ndarray:
+    """(T, K) Gaussian log-densities from per-state Cholesky factors (K, d, d) or one tied factor (d, d)."""
+    n_samples, n_features = X_.shape
+    framelogprob = np.empty((n_samples, means.shape[0]))
+    for k in range(means.shape[0]):
+        chol_k, log_det_k = (chol, log_det) if chol.ndim == 2 else (chol[k], log_det[k])
+        z = solve_triangular(chol_k, (X_ - means[k]).T, lower=True)
+        framelogprob[:, k] = -0.5 * ((z ** 2).sum(axis=0) + n_features * np.log(2 * np.pi) + log_det_k)
+    return framelogprob
+
+
+class RegimeParams:
+    """
+    Array-backed Gaussian regime parameters: stacked means (K, d) and covars, either
+    (K, d) for diagonal or (K, d, d) for full covariances, with one label per regime.
+    """
+    def __init__(self, means, covars, labels: list=None):
+        self.means = np.asarray(means, dtype=float)
+        self.covars = np.asarray(covars, dtype=float)
+        self.labels = use_default(labels, [f'{idx+1}' for idx in range(self.means.shape[0])])
+        # per-regime log-determinants, computed on first use and kept while the regimes are reused
+        self.log_det = None
+
+    @classmethod
+    def from_model(cls, model, log_det=None):
+        # hmmlearn's covars_ is always (K, d, d); keep diagonal models compact
+        if model.covariance_type in ("diag", "spherical"):
+            covars = np.diagonal(model.covars_, axis1=1, axis2=2).copy()
+        else:
+            covars = model.covars_.copy()
+        regimes = cls(model.means_.copy(), covars)
+        if log_det is not None:
+            regimes.log_det = np.broadcast_to(log_det, (regimes.means.shape[0],)).copy()
+        return regimes
+
+    @classmethod
+    def from_frozen(cls, regimes: dict):
+        """Convert the legacy {label: scipy multivariate_normal} representation."""
+        means = np.stack([rv.mean for rv in regimes.values()])
+        covars = np.stack([rv.cov for rv in regimes.values()])
+        return cls(means, covars, labels=list(regimes.keys()))
+
+    def __len__(self):
+        return self.means.shape[0]
+
+    @property
+    def is_diag(self) -> bool:
+        return self.covars.ndim == 2
+
+    def full_covars(self) -> np.ndarray:
+        if self.is_diag:
+            return np.einsum("ki,ij->kij", self.covars, np.eye(self.covars.shape[1]))
+        return self.covars
+
+    def log_dets(self) -> np.ndarray:
+        if self.log_det is None:
+            self.log_det = np.log(self.covars).sum(axis=1) if self.is_diag else _cholesky_factors(self.covars)[1]
+        return self.log_det
+
+    def relabel(self, labels: list):
+        regimes = RegimeParams(self.means, self.covars, labels=list(labels))
+        regimes.log_det = self.log_det
+        return regimes
+
+
+_WORKER_X = None
+
+
+def _set_worker_data(X_):
+    # ship the standardised data once per worker process instead of once per task
+    global _WORKER_X
+    _WORKER_X = X_
+
+
+def _fit_candidate_labels(n_components, covariance_type, n_iter, tol, lengths=None, X_=None):
+    """Fit one candidate K of optimal_number_of_state and return its decoded states."""
+    X_ = _WORKER_X if X_ is None else X_
+    cluster_model = R2KMeans(n_components, init_method="k++", stable_init=True)
+    cluster_model.fit(X_)
+    init_means = cluster_model.means
+
+    start_prob = np.array([1.0] * n_components) / n_components
+    prev_transmat = np.ones((n_components, n_components)) / n_components
+    model = hmm.GaussianHMM(
+        n_components=n_components, covariance_type=covariance_type,
+        n_iter=n_iter, tol=tol, init_params=''
+    )
+    model.startprob_ = start_prob
+    model.transmat_ = prev_transmat
+    model.means_ = init_means
+    model.fit(X_, lengths)
+    return model.predict(X_, lengths)
+
+
+class _HistoryMonitor(ConvergenceMonitor):
+    """ConvergenceMonitor that keeps the whole log-likelihood trace of the last fit."""
+    def __init__(self, tol, n_iter, verbose):
+        super().__init__(tol, n_iter, verbose)
+        self.full_history = []
+
+    def _reset(self):
+        super()._reset()
+        self.full_history = []
+
+    def report(self, log_prob):
+        self.full_history.append(log_prob)
+        super().report(log_prob)
+
+
+def _new_gaussian_hmm(n_components, covariance_type, n_iter, tol, covars_prior=None):
+    model = hmm.GaussianHMM(n_components=n_components, covariance_type=covariance_type,
+                            n_iter=n_iter, tol=tol, init_params='')
+    if covars_prior is not None:
+        model.covars_prior = covars_prior
+    model.monitor_ = _HistoryMonitor(model.monitor_.tol, model.monitor_.n_iter, model.monitor_.verbose)
+    return model
+
+
+def _fit_restart(cluster_model, seed, n_components, covariance_type, n_iter, tol, start_prob, transmat, lengths=None,
+                 covars_prior=None, X_=None):
+    """
+    One EM run of R2GaussianHMM.fit from the means of cluster_model fitted on X_.
+    seed (if not None) seeds numpy's global RNG for the clustering; the caller's RNG state is restored.
+    Returns (hmm model, cluster model, final log-likelihood, (clustering seconds, EM seconds)).
+    """
+    X_ = _WORKER_X if X_ is None else X_
+    start = time.perf_counter()
+    if seed is not None:
+        rng_state = np.random.get_state()
+        np.random.seed(seed)
+    try:
+        cluster_model.fit(X_)
+    finally:
+        if seed is not None:
+            np.random.set_state(rng_state)
+    init_means = cluster_model.means
+    cluster_time = time.perf_counter() - start
+
+    model = _new_gaussian_hmm(n_components, covariance_type, n_iter, tol, covars_prior)
+    model.startprob_ = start_prob
+    model.means_ = init_means
+    if transmat is not None:
+        model.transmat_ = transmat
+    model.fit(X_, lengths)
+    return model, cluster_model, model.monitor_.history[-1], (cluster_time, time.perf_counter() - start - cluster_time)
+
+
+class FitProfiler:
+    """
+    Stage-level timings of R2GaussianHMM fits, aggregated over many fits (e.g. a rolling run).
+    Attach it with R2GaussianHMM(profiler=...); each fit then adds one record per stage
+    (scale, k_search, cluster, em, regimes, assign, incremental; partial_fit for partial_fit
+    calls) with the wall time, EM iterations where relevant and, while tracemalloc is tracing,
+    the net and peak bytes allocated in the stage.
+    For cold fits, cluster and em times are summed over the n_init restarts (over workers when
+    they run in parallel) and the allocation of the whole restart block is booked on em.
+    """
+    def __init__(self, trace_memory: bool=False):
+        self.records = []
+        self.tags = {}
+        self.n_fits = 0
+        # trace_memory: start tracemalloc now (stopped by close) so every stage reports allocations
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def tag(self, **tags):
+        """Columns added to every following record, e.g. tag(date=t) in a rolling loop."""
+        self.tags.update(tags)
+
+    def start_fit(self):
+        self.n_fits += 1
+
+    @contextmanager
+    def stage(self, name: str, **info):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            traced_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        record = {"fit": self.n_fits, "stage": name, **self.tags, **info}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - start
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record["traced_bytes"] = traced_bytes
+                record["alloc_bytes"] = current - traced_bytes
+                record["peak_bytes"] = peak - traced_bytes
+            self.records.append(record)
+
+    def add(self, name: str, wall_s: float, **info):
+        """Record a stage timed elsewhere (e.g. in a worker process)."""
+        self.records.append({"fit": self.n_fits, "stage": name, **self.tags, **info, "wall_s": wall_s})
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per (fit, stage)."""
+        return pd.DataFrame(self.records)
+
+    def summary(self) -> pd.DataFrame:
+        """Total, mean and max wall time and the number of records per stage."""
+        return self.to_frame().groupby("stage", sort=False)["wall_s"].agg(["sum", "mean", "max", "count"])
+
+    def to_jsonl(self, path: str):
+        self.to_frame().to_json(path, orient="records", lines=True, date_format="iso")
+
+    def close(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+
 class R2GaussianHMM(BaseHMM):
-    def __init__(self, n_components: int=None, covariance_type: str=None, n_iter: int=None, tol: float=None):
+    def __init__(self, n_components: int=None, covariance_type: str=None, n_iter: int=None, tol: float=None,
+                 incremental: bool=None, partial_n_iter: int=None, label_solver: str=None,
+                 cost_metric: str=None, n_jobs: int=None, silhouette_sample_size: int=None, random_state: int=None,
+                 n_init: int=None, warm_start: bool=None, warm_start_tol: float=None,
+                 low_memory: bool=None, dtype=None, trace_memory: bool=None, profiler: FitProfiler=None,
+                 shrinkage: float=None):
         super().__init__(n_components=n_components)
+        # "diag", "full", "tied" or "spherical"; full and tied reuse cached Cholesky factors (cholesky_factors)
         self.covariance_type = use_default(covariance_type, "diag")
+        # shrinkage: covariance prior added to each state's scatter in the M-step, lambda * I for
+        # full/tied (ridge towards the identity, keeps d=50+ full fits PD); None keeps hmmlearn's default
+        self.shrinkage = shrinkage
+        self.chol_cache_ = None
         self.n_iter = use_default(n_iter, 100)
         self.tol = use_default(tol, 1e-6)
 
+        # "lsa" (scipy linear_sum_assignment) or "scip" (cvxpy integer program, for parity checks)
+        self.label_solver = use_default(label_solver, "lsa")
+        self.label_solver_time_ = None
+        # "mixed" (alpha-weighted mean/covariance distance), "bhattacharyya" or "wasserstein"
+        self.cost_metric = use_default(cost_metric, "mixed")
+
+        # K search (n_components=None): candidates fitted n_jobs at a time, silhouette on a seeded sample
+        self.n_jobs = use_default(n_jobs, 1)
+        self.silhouette_sample_size = silhouette_sample_size
+        self.random_state = use_default(random_state, 0)
+        self.k_search_scores_ = None
+
+        # EM restarts per fit: the usual (stable) initialisation plus n_init-1 seeded k++ ones, run
+        # n_jobs at a time; the highest-likelihood run is kept
+        self.n_init = use_default(n_init, 1)
+        self.restart_log_likelihoods_ = None
+        self.restart_spread_ = None
+        self.restart_times_ = None
+
+        # warm start: refits seed EM with the previous means, covars, transmat and startprob and skip
+        # re-clustering while the largest matched regime cost of the last fit stays below warm_start_tol
+        self.warm_start = use_default(warm_start, False)
+        self.warm_start_tol = use_default(warm_start_tol, 0.5)
+        self.regime_shift_ = None
+
+        # convergence telemetry of the last fit, and one record per fit
+        self.n_iter_ = None
+        self.converged_ = None
+        self.log_likelihood_history_ = None
+        self.fit_history_ = []
+
+        # low-memory mode: no defensive deepcopy, one private buffer in `dtype` standardised in place.
+        # With dtype=np.float32 the data buffer is half the size; hmmlearn still accumulates in float64,
+        # so only the input rounding (~1e-7 relative) differs: posteriors agree with float64 fits to
+        # ~1e-5 and log-likelihoods to ~1e-6 relative, unless EM lands on a different local optimum
+        self.low_memory = use_default(low_memory, False)
+        self.dtype = use_default(dtype, np.float64)
+        # trace_memory: record the peak bytes allocated during each fit (tracemalloc) in peak_bytes_
+        self.trace_memory = use_default(trace_memory, False)
+        self.peak_bytes_ = None
+        # optional FitProfiler collecting per-stage timings; not part of the model state (dropped on copy/pickle)
+        self.profiler = profiler
+
+        # incremental (expanding-window) engine, see partial_fit
+        self.incremental = use_default(incremental, False)
+        self.partial_n_iter = use_default(partial_n_iter, 10)
+        self.inc_stats = None
+        self.inc_fwd = None
+
         self.prev_regimes = None
         self.start_prob = None
 
         self.cluster_model = None
+        self.sequence_lengths_ = None
         #self.cluster_dump = None
 
+    def covars_prior(self, n_features: int):
+        if self.shrinkage is None:
+            return None
+        if self.covariance_type in ("full", "tied"):
+            return self.shrinkage * np.eye(n_features)
+        return self.shrinkage
+
+    def cholesky_factors(self) -> tuple:
+        """
+        (chol, log_det) of the fitted full (K, d, d) or tied (d, d) covariances, recomputed only
+        when the covariances changed, and shared by scoring, transform, partial_fit and RegimeFilter.
+        """
+        covars = self.model._covars_
+        if self.chol_cache_ is None or not np.array_equal(self.chol_cache_[0], covars):
+            self.chol_cache_ = (covars.copy(), *_cholesky_factors(covars))
+        return self.chol_cache_[1:]
+
+    def frame_log_likelihood(self, X_) -> np.ndarray:
+        """(T, K) emission log-likelihoods of standardised observations."""
+        if self.covariance_type in ("full", "tied"):
+            return _log_density_chol(X_, self.model.means_, *self.cholesky_factors())
+        return self.model._compute_log_likelihood(X_)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["profiler"] = None
+        return state
+
+    def profile_stage(self, name: str, **info):
+        if self.profiler is None:
+            return nullcontext({})
+        return self.profiler.stage(name, **info)
+
 
     def process_data_input(self, data):  # ensure data is a dataframe
 
@@ -48,40 +433,143 @@ class R2GaussianHMM(BaseHMM):
         else:
             raise TypeError(f'ERROR -> data is not a numpy array, instead is {type(data)}')
 
-    def fit(self, X):
-        X_ = copy.deepcopy(X)
+    def process_sequences(self, data, group_key: str=None) -> tuple:
+        """
+        Stack several sequences for one shared-parameter HMM.
+        data is a single array/DataFrame, a list of them, or a long-format DataFrame whose
+        group_key column (or index level) identifies the sequence of each row.
+        Returns (X, lengths, keys); lengths and keys are None for a single sequence.
+        """
+        if group_key is not None:
+            if group_key in data.columns:
+                groups = data.groupby(group_key, sort=False)
+                seqs = [(key, group.drop(columns=group_key)) for key, group in groups]
+            else:
+                seqs = list(data.groupby(level=group_key, sort=False))
+        elif isinstance(data, (list, tuple)):
+            seqs = list(enumerate(data))
+        else:
+            return self.process_data_input(data), None, None
+
+        arrays = [self.process_data_input(seq) for _, seq in seqs]
+        lengths = np.array([arr.shape[0] for arr in arrays])
+        return np.concatenate(arrays), lengths, [key for key, _ in seqs]
+
+    def fit(self, X, group_key: str=None):
+        """
+        :param X: one sequence, a list of sequences, or a long-format DataFrame with group_key;
+                  several sequences are fitted jointly as one HMM with shared parameters
+        """
+        if not self.trace_memory:
+            return self.fit_sequences(X, group_key)
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        base_bytes = tracemalloc.get_traced_memory()[0]
+        n_records = len(self.profiler.records) if self.profiler is not None else 0
+        try:
+            self.fit_sequences(X, group_key)
+        finally:
+            self.peak_bytes_ = tracemalloc.get_traced_memory()[1] - base_bytes
+            if self.profiler is not None:
+                # profiler stages reset the tracemalloc peak, so fold their peaks back in
+                self.peak_bytes_ = max([self.peak_bytes_] + [
+                    rec["traced_bytes"] + rec["peak_bytes"] - base_bytes
+                    for rec in self.profiler.records[n_records:] if "peak_bytes" in rec])
+            if started:
+                tracemalloc.stop()
+        self.fit_history_[-1]["peak_bytes"] = self.peak_bytes_
+
+    def fit_sequences(self, X, group_key: str=None):
+        if self.profiler is not None:
+            self.profiler.start_fit()
+
+        with self.profile_stage("scale"):
+            if self.low_memory:
+                X_, lengths, _ = self.process_sequences(X, group_key)
+                if lengths is None:
+                    X_ = np.array(X_, dtype=self.dtype)
+                else:
+                    # several sequences were already concatenated into a fresh array
+                    X_ = np.asarray(X_, dtype=self.dtype)
+                X_raw = None
+            else:
+                X_ = copy.deepcopy(X)
+                X_, lengths, _ = self.process_sequences(X_, group_key)
+                X_raw = X_
+            if self.incremental and lengths is not None:
+                raise ValueError('ERROR -> incremental mode supports a single sequence only')
+            self.sequence_lengths_ = lengths
 
-        X_ = self.process_data_input(X_)
+            warm = (self.warm_start and getattr(self, "model", None) is not None
+                    and self.model.n_components == self.n_components
+                    and (self.model.transmat_.sum(axis=1) > 0).all()
+                    and (self.regime_shift_ is None or self.regime_shift_ <= self.warm_start_tol))
+            prev_scaler = getattr(self, "scaler", None)
 
-        self.scaler = StandardScaler()
-        self.scaler.fit(X_)
-        X_ = self.scaler.transform(X_)
+            self.scaler = StandardScaler()
+            self.scaler.fit(X_)
+            X_ = self.scaler.transform(X_, copy=not self.low_memory)
 
         if self.n_components is None:
-            self.optimal_number_of_state(X_)
+            with self.profile_stage("k_search") as record:
+                self.optimal_number_of_state(X_, lengths)
+                record["n_components"] = self.n_components
 
-        if self.cluster_model is None:
-            self.cluster_model = R2KMeans(self.n_components, init_method="k++", stable_init=True)
-            self.start_prob = np.array([1.0] * self.n_components) / self.n_components
+        if warm:
+            with self.profile_stage("em", warm_start=True) as record:
+                try:
+                    self.fit_warm(X_, prev_scaler, lengths)
+                except (ValueError, np.linalg.LinAlgError):
+                    # a regime collapsed under the previous parameters: re-cluster instead
+                    warm = False
+                record["n_iter"] = self.model.monitor_.iter if warm else None
+
+        if not warm:
+            if self.cluster_model is None:
+                self.cluster_model = R2KMeans(self.n_components, init_method="k++", stable_init=True)
+                self.start_prob = np.array([1.0] * self.n_components) / self.n_components
+            # re-clustering reorders the states, so the previous transmat_ does not carry over; seed
+            # EM with the uniform matrix rather than let hmmlearn draw one from the global RNG
             self.prev_transmat_ = np.ones((self.n_components, self.n_components)) / self.n_components
-        else:
-            self.prev_transmat_ = None
 
-        self.cluster_model.fit(X_)
-        init_means = self.cluster_model.means
+            with self.profile_stage("em", warm_start=False) as record:
+                self.fit_restarts(X_, lengths)
+            if self.profiler is not None:
+                cluster_time, em_time = np.sum(self.restart_times_, axis=0)
+                self.profiler.add("cluster", cluster_time, n_restarts=self.n_init)
+                record.update(wall_s=em_time, n_iter=self.model.monitor_.iter, n_restarts=self.n_init)
 
-        self.model = hmm.GaussianHMM(n_components=self.n_components, covariance_type=self.covariance_type,
-                                     n_iter=self.n_iter, tol=self.tol, init_params='')
-        self.model.startprob_ = self.start_prob
-        self.model.means_ = init_means
-        if self.prev_transmat_ is not None:
-            self.model.transmat_ = self.prev_transmat_
-        self.model.fit(X_)
+        self.n_iter_ = self.model.monitor_.iter
+        self.converged_ = self.model.monitor_.converged
+        self.log_likelihood_history_ = list(self.model.monitor_.full_history)
+        self.fit_history_.append({
+            "n_samples": X_.shape[0],
+            "warm_start": warm,
+            "n_iter": self.n_iter_,
+            "converged": self.converged_,
+            "log_likelihood": self.log_likelihood_history_[-1] if self.log_likelihood_history_ else np.nan,
+        })
 
-        regimes = self.get_model_regimes()
+        self.update_regime_labels()
+
+        if self.incremental:
+            with self.profile_stage("incremental"):
+                if X_raw is None:
+                    X_raw = self.scaler.inverse_transform(X_)
+                self.init_incremental_state(X_raw, X_)
+
+    def update_regime_labels(self):
+        """Match the fitted regimes to the previous fit's, keeping labels continuous across refits."""
+        with self.profile_stage("regimes"):
+            regimes = self.get_model_regimes()
 
         if self.prev_regimes is not None:
-            assign_mat, regimes = self.assign_labels(previous_regimes=self.prev_regimes, new_regimes=regimes)
+            with self.profile_stage("assign", solver=self.label_solver):
+                assign_mat, regimes = self.assign_labels(previous_regimes=self.prev_regimes, new_regimes=regimes)
             map_ = {old_idx: None for old_idx in range(assign_mat.shape[1])}
             new_added_count = 0
             num_old_regimes = assign_mat.shape[0]
@@ -103,35 +591,297 @@ class R2GaussianHMM(BaseHMM):
         self.current_regime_index_remap = {old_idx: new_idx for new_idx, old_idx in enumerate(sorted_idx)}
         self.prev_regimes = copy.deepcopy(regimes)
 
+    def adopt_fit(self, fitted):
+        """
+        Take over a cold fit of the same slice and fit options (e.g. from a FitCache) as if this
+        model had run it: EM parameters, scaler and telemetry are copied, while regime labels are
+        matched against this model's own history. fitted must be a private copy.
+        """
+        self.model = fitted.model
+        self.scaler = fitted.scaler
+        self.sequence_lengths_ = fitted.sequence_lengths_
+        if self.cluster_model is None:
+            self.cluster_model = fitted.cluster_model
+            self.start_prob = fitted.start_prob
+        self.prev_transmat_ = fitted.prev_transmat_
+        self.restart_log_likelihoods_ = fitted.restart_log_likelihoods_
+        self.restart_spread_ = fitted.restart_spread_
+        self.restart_times_ = fitted.restart_times_
+        self.n_iter_ = fitted.n_iter_
+        self.converged_ = fitted.converged_
+        self.log_likelihood_history_ = fitted.log_likelihood_history_
+        self.fit_history_.append(fitted.fit_history_[-1])
+        self.update_regime_labels()
 
-    def optimal_number_of_state(self, X_):
-        is_score_decreasing = False
-        self.n_components = 2
-        best_silhouette_score = -1
+    def fit_warm(self, X_, prev_scaler, lengths=None):
+        """
+        EM seeded with the previous fit's full parameter set, re-expressed in the new scaler's
+        units; no clustering. n_init restarts only apply to cold fits.
+        """
+        ratio = prev_scaler.scale_ / self.scaler.scale_
+        means = (self.model.means_ * prev_scaler.scale_ + prev_scaler.mean_ - self.scaler.mean_) / self.scaler.scale_
+        covars = self.model._covars_
+        if self.covariance_type == "diag":
+            covars = covars * ratio ** 2
+        elif self.covariance_type == "spherical":
+            covars = covars * np.mean(ratio ** 2)
+        else:  # full (K, d, d) or tied (d, d)
+            covars = covars * np.outer(ratio, ratio)
+
+        model = _new_gaussian_hmm(self.n_components, self.covariance_type, self.n_iter, self.tol,
+                                  self.covars_prior(X_.shape[1]))
+        model.startprob_ = self.model.startprob_
+        model.transmat_ = self.model.transmat_
+        model.means_ = means
+        model.covars_ = covars
+        model.fit(X_, lengths)
+        self.model = model
+
+    def fit_restarts(self, X_, lengths=None):
+        """
+        Run n_init EM fits and keep the one with the highest final log-likelihood.
+        Restart 0 uses self.cluster_model as before; the others use fresh k++ clusterings
+        seeded with random_state + i. Label matching in fit only sees the winner; the stable
+        clustering of restart 0 is kept for later fits and only takes over the winner's means.
+        """
+        restarts = [(self.cluster_model, None)]
+        restarts += [(R2KMeans(self.n_components, init_method="k++", stable_init=False), self.random_state + i)
+                     for i in range(1, self.n_init)]
+        args = (self.n_components, self.covariance_type, self.n_iter, self.tol, self.start_prob, self.prev_transmat_, lengths,
+                self.covars_prior(X_.shape[1]))
+
+        if self.n_init > 1 and self.n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, self.n_init),
+                                     initializer=_set_worker_data, initargs=(X_,)) as executor:
+                futures = [executor.submit(_fit_restart, cluster_model, seed, *args) for cluster_model, seed in restarts]
+                results = [fut.result() for fut in futures]
+        else:
+            results = [_fit_restart(cluster_model, seed, *args, X_=X_) for cluster_model, seed in restarts]
+
+        scores = np.array([score for _, _, score, _ in results])
+        best = int(np.argmax(scores))
+        self.model = results[best][0]
+        self.cluster_model = results[0][1]
+        if best != 0:
+            self.cluster_model.means = results[best][1].means
+        self.restart_times_ = [times for _, _, _, times in results]
+        self.restart_log_likelihoods_ = scores
+        self.restart_spread_ = float(scores.max() - scores.min())
+
+    def init_incremental_state(self, X_raw, X_):
+        """
+        Run one E-step over the fitted data and keep the EM sufficient statistics (in raw,
+        unscaled units) and the last filtered state distribution for partial_fit.
+        """
+        if self.covariance_type not in ("diag", "full"):
+            raise ValueError(f'ERROR -> incremental mode supports diag and full covariances, not {self.covariance_type}')
 
-        while True ^ is_score_decreasing:
-            cluster_model = R2KMeans(self.n_components, init_method="k++", stable_init=True)
-            cluster_model.fit(X_)
-            init_means = cluster_model.means
+        framelogprob = self.frame_log_likelihood(X_)
+        fwd, log_scale = _forward_pass(framelogprob, self.model.startprob_, self.model.transmat_)
+        bwd, scaled_emission = _backward_pass(framelogprob, self.model.transmat_, log_scale, fwd)
+        posteriors = fwd * bwd
 
-            start_prob = np.array([1.0] * self.n_components) / self.n_components
-            prev_transmat = np.ones((self.n_components, self.n_components)) / self.n_components
-            model = hmm.GaussianHMM(
-                n_components=self.n_components, covariance_type=self.covariance_type,
-                n_iter=self.n_iter, tol=self.tol, init_params=''
+        self.inc_stats = self.sufficient_statistics(X_raw, posteriors)
+        self.inc_stats["trans"] = self.model.transmat_ * (fwd[:-1].T @ (scaled_emission[1:] * bwd[1:]))
+        self.inc_stats["start"] = posteriors[0]
+        self.inc_fwd = fwd[-1]
+
+    def sufficient_statistics(self, X_raw, posteriors) -> dict:
+        stats = {
+            "post": posteriors.sum(axis=0),
+            "obs": posteriors.T @ X_raw,
+        }
+        if self.covariance_type == "diag":
+            stats["obs**2"] = posteriors.T @ X_raw ** 2
+        else:
+            stats["obs*obs.T"] = np.einsum("ti,tj,tk->ijk", posteriors, X_raw, X_raw)
+        return stats
+
+    def incremental_mstep(self, stats: dict):
+        """
+        M-step on raw-unit sufficient statistics, expressed in the current scaler's units.
+        Mirrors hmmlearn's GaussianHMM M-step with its default priors.
+        """
+        mean, scale = self.scaler.mean_, self.scaler.scale_
+        post = stats["post"]
+        denom = np.maximum(post, 1e-5)
+
+        obs = (stats["obs"] - post[:, None] * mean) / scale
+        means = obs / denom[:, None]
+
+        if self.covariance_type == "diag":
+            obs2 = (stats["obs**2"] - 2 * mean * stats["obs"] + post[:, None] * mean ** 2) / scale ** 2
+            c_n = obs2 - 2 * means * obs + means ** 2 * post[:, None]
+            covars = (self.model.covars_prior + c_n) / denom[:, None]
+            covars = np.maximum(covars, self.model.min_covar)
+        else:
+            obs_mean = np.einsum("ki,j->kij", stats["obs"], mean)
+            oo = (stats["obs*obs.T"] - obs_mean - obs_mean.transpose(0, 2, 1)
+                  + post[:, None, None] * np.outer(mean, mean)) / np.outer(scale, scale)
+            c_n = oo - post[:, None, None] * np.einsum("ki,kj->kij", means, means)
+            n_features = means.shape[1]
+            covars = (self.model.covars_prior * np.eye(n_features) + c_n) / denom[:, None, None]
+            covars += self.model.min_covar * np.eye(n_features)
+
+        transmat = np.maximum(self.model.transmat_prior - 1 + stats["trans"], 0)
+        row_sum = transmat.sum(axis=1, keepdims=True)
+        transmat = np.where(row_sum > 0, transmat / np.where(row_sum > 0, row_sum, 1), self.model.transmat_)
+
+        return means, covars, transmat
+
+    def partial_fit(self, X_new, n_iter: int=None) -> np.ndarray:
+        """
+        Expanding-window update: absorb the new observations into the running sufficient
+        statistics and re-run EM from the current parameters, touching only X_new.
+        Posteriors of earlier observations are kept fixed, so the cost per call depends on
+        len(X_new) and not on the length of the history.
+        Returns the filtered state probabilities of the new observations.
+        """
+        if self.inc_stats is None:
+            raise ValueError('ERROR -> partial_fit requires a model fitted with incremental=True')
+        n_iter = use_default(n_iter, self.partial_n_iter)
+        if n_iter < 1:
+            raise ValueError(f'ERROR -> n_iter must be at least 1, got {n_iter}')
+
+        if self.profiler is not None:
+            self.profiler.start_fit()
+        with self.profile_stage("partial_fit", n_samples=len(X_new)) as record:
+            fwd, record["n_iter"] = self.partial_em(X_new, n_iter)
+        return fwd
+
+    def partial_em(self, X_new, n_iter: int) -> tuple:
+        """Body of partial_fit; returns (filtered probabilities, EM iterations run)."""
+
+        X_raw = self.process_data_input(X_new)
+        self.scaler.partial_fit(X_raw)
+        X_ = self.scaler.transform(X_raw)
+
+        # re-express the current parameters in the updated scaler's units
+        self.model.means_, self.model.covars_, self.model.transmat_ = self.incremental_mstep(self.inc_stats)
+
+        prev_ll = -np.inf
+        for it in range(n_iter):
+            framelogprob = self.frame_log_likelihood(X_)
+            fwd, log_scale = _forward_pass(framelogprob, self.model.startprob_, self.model.transmat_, init_fwd=self.inc_fwd)
+            bwd, scaled_emission = _backward_pass(framelogprob, self.model.transmat_, log_scale, fwd)
+            posteriors = fwd * bwd
+
+            new_stats = self.sufficient_statistics(X_raw, posteriors)
+            # transitions inside the new block plus the one linking it to the history
+            new_stats["trans"] = self.model.transmat_ * (
+                np.outer(self.inc_fwd, scaled_emission[0] * bwd[0])
+                + fwd[:-1].T @ (scaled_emission[1:] * bwd[1:])
             )
-            model.startprob_ = start_prob
-            model.transmat_ = prev_transmat
-            model.means_ = init_means
-            model.fit(X_)
-
-            s_score = silhouette_score(X_, model.predict(X_))
-            if s_score >= best_silhouette_score:
-                self.n_components += 1
-                best_silhouette_score = s_score
-            else:
-                is_score_decreasing = True
-        self.n_components -= 1
+            stats = {key: self.inc_stats[key] + new_stats[key] for key in new_stats}
+            stats["start"] = self.inc_stats["start"]
+            self.model.means_, self.model.covars_, self.model.transmat_ = self.incremental_mstep(stats)
+
+            ll = log_scale.sum()
+            if ll - prev_ll < self.tol:
+                break
+            prev_ll = ll
+
+        self.inc_stats = stats
+        self.inc_fwd = fwd[-1]
+        return fwd, it + 1
+
+    def optimal_number_of_state(self, X_, lengths=None):
+        """
+        Increase K from 2 until the silhouette score decreases and keep the last K before the drop.
+        With n_jobs > 1, K, K+1, ... K+n_jobs-1 are fitted concurrently and scanned in order, so the
+        chosen K is the same as the sequential scan. The pairwise distances are computed once
+        (on a seeded sample of silhouette_sample_size rows if given) and reused for every K.
+        """
+        n_samples = X_.shape[0]
+        if self.silhouette_sample_size is not None and self.silhouette_sample_size < n_samples:
+            rng = np.random.RandomState(self.random_state)
+            sample_idx = np.sort(rng.choice(n_samples, self.silhouette_sample_size, replace=False))
+        else:
+            sample_idx = np.arange(n_samples)
+        distances = pairwise_distances(X_[sample_idx])
+
+        executor = None
+        if self.n_jobs > 1:
+            executor = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_set_worker_data, initargs=(X_,))
+
+        self.k_search_scores_ = {}
+        best_silhouette_score = -1
+        n_components = 2
+        try:
+            while True:
+                candidates = list(range(n_components, n_components + self.n_jobs))
+                args = ([self.covariance_type] * len(candidates), [self.n_iter] * len(candidates), [self.tol] * len(candidates),
+                        [lengths] * len(candidates))
+                if executor is None:
+                    labels_list = [_fit_candidate_labels(k, self.covariance_type, self.n_iter, self.tol, lengths, X_=X_) for k in candidates]
+                else:
+                    labels_list = executor.map(_fit_candidate_labels, candidates, *args)
+
+                for k, labels in zip(candidates, labels_list):
+                    labels = labels[sample_idx]
+                    if np.unique(labels).shape[0] < 2:
+                        s_score = -1
+                    else:
+                        s_score = silhouette_score(distances, labels, metric="precomputed")
+                    self.k_search_scores_[k] = s_score
+
+                    if s_score >= best_silhouette_score:
+                        best_silhouette_score = s_score
+                        n_components = k + 1
+                    else:
+                        self.n_components = k - 1
+                        return
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def transform(self, X, group_key: str=None, n_jobs: int=None):
+        """
+        Posterior state probabilities. A single sequence goes through BaseHMM.transform; a list of
+        sequences or a long-format DataFrame with group_key is decoded sequence by sequence,
+        n_jobs sequences at a time, and returned as {sequence key: posteriors (T_i, K)}.
+        """
+        if group_key is None and not isinstance(X, (list, tuple)):
+            if self.covariance_type in ("full", "tied"):
+                # forward-backward on the cached Cholesky factors instead of hmmlearn refactorising
+                X_ = self.scaler.transform(np.array(self.process_data_input(X), dtype=self.dtype), copy=False)
+                framelogprob = self.frame_log_likelihood(X_)
+                fwd, log_scale = _forward_pass(framelogprob, self.model.startprob_, self.model.transmat_)
+                bwd, _ = _backward_pass(framelogprob, self.model.transmat_, log_scale, fwd)
+                return fwd * bwd
+            if self.low_memory:
+                X_ = np.array(self.process_data_input(X), dtype=self.dtype)
+                return self.model.predict_proba(self.scaler.transform(X_, copy=False))
+            return super().transform(X)
+
+        X_, lengths, keys = self.process_sequences(X, group_key)
+        seqs = np.split(self.scaler.transform(X_), np.cumsum(lengths)[:-1])
+        n_jobs = use_default(n_jobs, self.n_jobs)
+        if n_jobs > 1 and len(seqs) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(seqs))) as executor:
+                posteriors = list(executor.map(self.model.predict_proba, seqs))
+        else:
+            posteriors = [self.model.predict_proba(seq) for seq in seqs]
+        return dict(zip(keys, posteriors))
+
+    def score_observations(self, X, scale: bool=False) -> tuple:
+        """
+        Per-observation log-likelihoods of a whole array in one pass.
+        Returns (marginal, predictive):
+          marginal[t] = log sum_k startprob_k p(x_t | k), i.e. model.score(x_t.reshape(1, -1))
+          predictive[t] = log p(x_t | x_<t) from the forward pass, so predictive.sum() == model.score(X)
+        :param scale: standardise X with the fitted scaler first; by default X is scored as given, like self.model.score
+        """
+        X_ = self.process_data_input(X)
+        if scale:
+            X_ = self.scaler.transform(X_)
+
+        framelogprob = self.frame_log_likelihood(X_)
+        with np.errstate(divide="ignore"):
+            log_startprob = np.log(self.model.startprob_)
+        marginal = logsumexp(log_startprob + framelogprob, axis=1)
+        _, predictive = _forward_pass(framelogprob, self.model.startprob_, self.model.transmat_)
+        return marginal, predictive
 
     def current_transition(self):
         sorted_idx = list(self.current_regime_index_remap.keys())
@@ -139,10 +889,10 @@ class R2GaussianHMM(BaseHMM):
         cur_trans = pd.DataFrame(self.model.transmat_[sorted_idx, :][:, sorted_idx], index=regime_list, columns=regime_list)
         return cur_trans
 
-    def get_model_regimes(self):
-        rv_list = [multivariate_normal(mean=self.model.means_[idx, :], cov=self.model.covars_[idx, ::]) for idx in range(self.model.means_.shape[0])]
-        regime_dict = {f'{idx+1}': rv for idx, rv in enumerate(rv_list)}
-        return regime_dict
+    def get_model_regimes(self) -> RegimeParams:
+        if self.covariance_type in ("full", "tied"):
+            return RegimeParams.from_model(self.model, log_det=self.cholesky_factors()[1])
+        return RegimeParams.from_model(self.model)
 
     def pair_assignment_cost(self, rv1, rv2, alpha=0.7) -> float:
         """
@@ -154,22 +904,76 @@ class R2GaussianHMM(BaseHMM):
 
         return alpha * mean_cost + (1 - alpha) * cov_cost
 
-    def get_cost_matrix(self, past_regimes: dict, new_regimes: dict) -> np.ndarray:
-        cost_mat = 10000 * np.ones(shape=(len(past_regimes), len(new_regimes)))
+    def get_cost_matrix(self, past_regimes: RegimeParams, new_regimes: RegimeParams, metric: str=None, alpha=0.7) -> np.ndarray:
+        """
+        Pairwise (past x new) regime distances computed in one broadcast.
+        :param metric: "mixed" (pair_assignment_cost), "bhattacharyya" or "wasserstein" (2-Wasserstein)
+        :param alpha: weights of mean cost for "mixed"
+        """
+        metric = use_default(metric, self.cost_metric)
+        if isinstance(past_regimes, dict):
+            past_regimes = RegimeParams.from_frozen(past_regimes)
+        if isinstance(new_regimes, dict):
+            new_regimes = RegimeParams.from_frozen(new_regimes)
+
+        diff = past_regimes.means[:, None, :] - new_regimes.means[None, :, :]  # (K1, K2, d)
+        diag = past_regimes.is_diag and new_regimes.is_diag
+        if diag:
+            cov1, cov2 = past_regimes.covars[:, None, :], new_regimes.covars[None, :, :]
+        else:
+            cov1, cov2 = past_regimes.full_covars()[:, None], new_regimes.full_covars()[None, :]
 
-        for i, past_rv in enumerate(past_regimes.values()):
-            for j, new_rv in enumerate(new_regimes.values()):
-                cost_mat[i, j] = self.pair_assignment_cost(past_rv, new_rv)
+        if metric == "mixed":
+            assert (alpha <= 1) and (alpha >= 0)
+            mean_cost = np.sqrt((diff ** 2).sum(axis=-1))
+            cov_diff = (cov1 - cov2) ** 2
+            cov_cost = np.sqrt(cov_diff.sum(axis=-1) if diag else cov_diff.sum(axis=(-2, -1)))
+            return alpha * mean_cost + (1 - alpha) * cov_cost
 
-        return cost_mat
+        if metric == "bhattacharyya":
+            # the regimes' own log-determinants are cached on RegimeParams; only the averaged
+            # covariances need a fresh factorisation, which gives both the Mahalanobis term and its log-det
+            cov = (cov1 + cov2) / 2
+            if diag:
+                maha = (diff ** 2 / cov).sum(axis=-1)
+                log_det_avg = np.log(cov).sum(axis=-1)
+            else:
+                chol, log_det_avg = _cholesky_factors(cov)
+                z = np.linalg.solve(chol, diff[..., None])[..., 0]
+                maha = (z ** 2).sum(axis=-1)
+            log_det = log_det_avg - 0.5 * (past_regimes.log_dets()[:, None] + new_regimes.log_dets()[None, :])
+            return maha / 8 + log_det / 2
+
+        if metric == "wasserstein":
+            mean_cost = (diff ** 2).sum(axis=-1)
+            if diag:
+                cov_cost = ((np.sqrt(cov1) - np.sqrt(cov2)) ** 2).sum(axis=-1)
+            else:
+                sqrt_cov2 = _sqrtm_psd(cov2)
+                cross = np.sqrt(np.maximum(np.linalg.eigvalsh(sqrt_cov2 @ cov1 @ sqrt_cov2), 0)).sum(axis=-1)
+                cov_cost = np.trace(cov1, axis1=-2, axis2=-1) + np.trace(cov2, axis1=-2, axis2=-1) - 2 * cross
+            return np.sqrt(np.maximum(mean_cost + cov_cost, 0))
+
+        raise ValueError(f'ERROR -> unknown cost metric {metric}')
+
+    def solve_assignment_lsa(self, cost_mat: np.ndarray) -> np.ndarray:
+        """
+        Exact assignment via the Hungarian algorithm. Squared costs give the same optimum as
+        the Frobenius-norm objective of solve_assignment_scip. Rectangular cost matrices are
+        supported: surplus new regimes are left unassigned.
+        """
+        rows, cols = linear_sum_assignment(cost_mat ** 2)
+        assign_mat = np.zeros_like(cost_mat)
+        assign_mat[rows, cols] = 1.0
+        return assign_mat
+
+    def solve_assignment_scip(self, cost_mat: np.ndarray) -> np.ndarray:
+        import cvxpy as cp
 
-    def assign_labels(self, previous_regimes: dict, new_regimes: dict) -> tuple:
-        # calculate cost matrix
-        cost_mat = self.get_cost_matrix(previous_regimes, new_regimes)
         num_old_regimes = cost_mat.shape[0]
 
         # decision variables
-        x = cp.Variable((len(previous_regimes), len(new_regimes)), integer=True)
+        x = cp.Variable(cost_mat.shape, integer=True)
 
         # objective
         obj_func = cp.Minimize(cp.atoms.norm(cp.multiply(cost_mat, x), 'fro') / num_old_regimes)
@@ -185,13 +989,31 @@ class R2GaussianHMM(BaseHMM):
         )
 
         # solve model
-        obj = model.solve(solver='SCIP')
+        model.solve(solver='SCIP')
+        return x.value
+
+    def assign_labels(self, previous_regimes: RegimeParams, new_regimes: RegimeParams) -> tuple:
+        if isinstance(previous_regimes, dict):
+            previous_regimes = RegimeParams.from_frozen(previous_regimes)
+
+        # calculate cost matrix
+        cost_mat = self.get_cost_matrix(previous_regimes, new_regimes)
+
         # get assignment matrix
-        assign_mat = x.value
+        start = time.perf_counter()
+        if self.label_solver == "lsa":
+            assign_mat = self.solve_assignment_lsa(cost_mat)
+        elif self.label_solver == "scip":
+            assign_mat = self.solve_assignment_scip(cost_mat)
+        else:
+            raise ValueError(f'ERROR -> unknown label_solver {self.label_solver}')
+        self.label_solver_time_ = time.perf_counter() - start
+        matched = assign_mat >= 0.9
+        self.regime_shift_ = float(cost_mat[matched].max()) if matched.any() else None
 
         # relabel new_regimes based on assignment matrix
 
-        previous_regime_labels = list(previous_regimes.keys())
+        previous_regime_labels = list(previous_regimes.labels)
 
         new_regime_labels = [None for _ in range(len(new_regimes))]
         newly_added_regime_labels = [f'{idx}' for idx in range(len(previous_regimes) + 1, len(new_regimes) + 1)]
@@ -204,7 +1026,7 @@ class R2GaussianHMM(BaseHMM):
             else:
                 new_regime_labels[idx] = previous_regime_labels[np.where(assign_mat[:, idx] >= 0.9)[0][0]]
 
-        return x.value, {new_label: regime for new_label, regime in zip(new_regime_labels, new_regimes.values())}
+        return assign_mat, new_regimes.relabel(new_regime_labels)
 
 
     def dump(self):
@@ -215,6 +1037,8 @@ class R2GaussianHMM(BaseHMM):
         reqs["model"] = self.model
         reqs["start_prob"] = self.start_prob
         reqs["prev_transmat_"] = self.prev_transmat_
+        reqs["inc_stats"] = self.inc_stats
+        reqs["inc_fwd"] = self.inc_fwd
 
         return reqs
 
@@ -223,7 +1047,208 @@ class R2GaussianHMM(BaseHMM):
         self.cluster_model.load(reqs["cluster_dump"])
         self.base_load(reqs)
         self.prev_regimes = reqs["prev_regimes"]
+        if isinstance(self.prev_regimes, dict):
+            self.prev_regimes = RegimeParams.from_frozen(self.prev_regimes)
         self.current_regime_index_remap = reqs["current_regime_index_remap"]
         self.model = reqs["model"]
         self.start_prob = reqs["start_prob"]
         self.prev_transmat_ = reqs["prev_transmat_"]
+        self.inc_stats = reqs.get("inc_stats")
+        self.inc_fwd = reqs.get("inc_fwd")
+
+    def to_arrays(self) -> dict:
+        """
+        Array-only snapshot of the fitted model: everything needed to transform, score and
+        filter, but not the R2KMeans state needed to continue warm-started refits (use dump for that).
+        """
+        remap = np.array([self.current_regime_index_remap[idx] for idx in range(self.model.n_components)])
+        return {
+            "version": np.array(SNAPSHOT_VERSION),
+            "covariance_type": np.array(self.covariance_type),
+            "means": self.model.means_,
+            "covars": self.model._covars_,
+            "transmat": self.model.transmat_,
+            "startprob": self.model.startprob_,
+            "scaler_mean": self.scaler.mean_,
+            "scaler_scale": self.scaler.scale_,
+            "remap": remap,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        if int(arrays["version"]) > SNAPSHOT_VERSION:
+            raise ValueError(f'ERROR -> snapshot version {int(arrays["version"])} is newer than {SNAPSHOT_VERSION}')
+        means = np.asarray(arrays["means"])
+        n_components, n_features = means.shape
+
+        obj = cls(n_components=n_components, covariance_type=str(arrays["covariance_type"]))
+        obj.model = _new_gaussian_hmm(n_components, obj.covariance_type, obj.n_iter, obj.tol)
+        obj.model.n_features = n_features
+        obj.model.means_ = means
+        obj.model.covars_ = np.asarray(arrays["covars"])
+        obj.model.transmat_ = np.asarray(arrays["transmat"])
+        obj.model.startprob_ = np.asarray(arrays["startprob"])
+        obj.start_prob = obj.model.startprob_
+
+        obj.scaler = StandardScaler()
+        obj.scaler.mean_ = np.asarray(arrays["scaler_mean"])
+        obj.scaler.scale_ = np.asarray(arrays["scaler_scale"])
+        obj.scaler.var_ = obj.scaler.scale_ ** 2
+        obj.scaler.n_features_in_ = n_features
+
+        obj.current_regime_index_remap = {old_idx: int(new_idx) for old_idx, new_idx in enumerate(arrays["remap"])}
+        obj.prev_regimes = obj.get_model_regimes()
+        return obj
+
+    def save_snapshot(self, path: str):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load_snapshot(cls, path: str):
+        with np.load(path) as arrays:
+            return cls.from_arrays(dict(arrays))
+
+    def regime_filter(self, history=None):
+        """
+        Streaming filter on the fitted model, optionally primed with the observed history.
+        """
+        regime_filter = RegimeFilter(self)
+        if history is not None:
+            regime_filter.prime(history)
+        return regime_filter
+
+
+class RegimeFilter:
+    """
+    Streaming forward filter on a fitted R2GaussianHMM.
+    Keeps the normalised forward vector, so each new observation costs O(K^2 + K*d)
+    (O(K^2 + K*d^2) for full covariances) regardless of how long the history is.
+    """
+    def __init__(self, hmm_model: R2GaussianHMM):
+        model = hmm_model.model
+        self.n_components = model.n_components
+        self.scaler_mean = hmm_model.scaler.mean_.copy()
+        self.scaler_scale = hmm_model.scaler.scale_.copy()
+        self.startprob = model.startprob_.copy()
+        self.transmat = model.transmat_.copy()
+        self.means = model.means_.copy()
+        self.covariance_type = model.covariance_type
+
+        n_features = self.means.shape[1]
+        covars = model.covars_
+        if self.covariance_type in ("diag", "spherical"):
+            variances = np.diagonal(covars, axis1=1, axis2=2)
+            self.inv_var = 1.0 / variances
+            self.log_norm = -0.5 * (n_features * np.log(2 * np.pi) + np.log(variances).sum(axis=1))
+        else:
+            # reuse the model's cached factors; a tied factor is shared by every state
+            chol, log_det = hmm_model.cholesky_factors()
+            self.inv_chol = np.broadcast_to(np.linalg.inv(chol), (self.n_components, n_features, n_features))
+            self.log_norm = -0.5 * (n_features * np.log(2 * np.pi) + np.broadcast_to(log_det, (self.n_components,)))
+
+        # output column P{new_idx+1} holds the state old_idx
+        self.order = np.empty(self.n_components, dtype=int)
+        for old_idx, new_idx in hmm_model.current_regime_index_remap.items():
+            self.order[new_idx] = old_idx
+
+        self.reset()
+
+    def reset(self, fwd=None):
+        self.fwd = None if fwd is None else np.asarray(fwd, dtype=float)
+        self.log_likelihood = 0.0
+        self.n_seen = 0
+
+    def log_emission(self, x_) -> np.ndarray:
+        diff = x_ - self.means
+        if self.covariance_type in ("diag", "spherical"):
+            maha = (diff ** 2 * self.inv_var).sum(axis=1)
+        else:
+            z = np.einsum("kij,kj->ki", self.inv_chol, diff)
+            maha = (z ** 2).sum(axis=1)
+        return self.log_norm - 0.5 * maha
+
+    def prime(self, X):
+        """
+        Run the forward pass over the history once and continue from its last filtered vector.
+        """
+        X_ = (np.asarray(X, dtype=float) - self.scaler_mean) / self.scaler_scale
+        framelogprob = np.stack([self.log_emission(x_) for x_ in X_])
+        fwd, log_scale = _forward_pass(framelogprob, self.startprob, self.transmat, init_fwd=self.fwd)
+        self.fwd = fwd[-1]
+        self.log_likelihood += log_scale.sum()
+        self.n_seen += X_.shape[0]
+
+    def update(self, x) -> dict:
+        """
+        Absorb one observation and return the filtered P1..PK and the RegimeLabel.
+        """
+        x_ = (np.asarray(x, dtype=float).ravel() - self.scaler_mean) / self.scaler_scale
+        log_b = self.log_emission(x_)
+        prior = self.startprob if self.fwd is None else self.fwd @ self.transmat
+
+        with np.errstate(divide="ignore"):
+            self.fwd, log_c = _log_normalise(np.log(prior), log_b)
+        self.log_likelihood += log_c
+        self.n_seen += 1
+
+        probs = self.fwd[self.order]
+        return {**{f"P{i+1}": probs[i] for i in range(self.n_components)},
+                "RegimeLabel": int(np.argmax(probs)) + 1}
+
+
+class RegimeSnapshotArchive:
+    """
+    Many R2GaussianHMM.to_arrays snapshots (e.g. one per rolling date) stored as a directory with
+    one stacked .npy file per field (leading axis = snapshot) and an index.json holding the keys,
+    format version and covariance type. Fields are memory-mapped on first use, so reading
+    snapshot t only touches its slices.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            index = json.load(f)
+        if index["version"] > SNAPSHOT_VERSION:
+            raise ValueError(f'ERROR -> archive version {index["version"]} is newer than {SNAPSHOT_VERSION}')
+        self.version = index["version"]
+        self.covariance_type = index["covariance_type"]
+        self.keys = index["keys"]
+        self.positions = {key: pos for pos, key in enumerate(self.keys)}
+        self.fields = {}
+
+    @classmethod
+    def write(cls, path: str, snapshots: list, keys: list=None):
+        """
+        :param snapshots: R2GaussianHMM.to_arrays() dicts, all with the same K and d
+        :param keys: one label per snapshot (stored as str), defaults to 0..n-1
+        """
+        keys = [str(key) for key in use_default(keys, range(len(snapshots)))]
+        os.makedirs(path, exist_ok=True)
+        for field in SNAPSHOT_FIELDS:
+            shapes = {np.shape(snap[field]) for snap in snapshots}
+            if len(shapes) > 1:
+                raise ValueError(f'ERROR -> snapshots disagree on the shape of {field}: {shapes}')
+            np.save(os.path.join(path, f"{field}.npy"), np.stack([snap[field] for snap in snapshots]))
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump({
+                "version": SNAPSHOT_VERSION,
+                "covariance_type": str(snapshots[0]["covariance_type"]),
+                "keys": keys,
+            }, f)
+        return cls(path)
+
+    def field(self, name: str) -> np.ndarray:
+        if name not in self.fields:
+            self.fields[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self.fields[name]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, pos: int) -> R2GaussianHMM:
+        arrays = {name: np.array(self.field(name)[pos]) for name in SNAPSHOT_FIELDS}
+        arrays["version"] = self.version
+        arrays["covariance_type"] = self.covariance_type
+        return R2GaussianHMM.from_arrays(arrays)
+
+    def loc(self, key) -> R2GaussianHMM:
+        return self[self.positions[str(key)]]
@@ -1,31 +1,113 @@
 # r2pca_utils.py
 
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.cm import get_cmap
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.linalg.blas import get_blas_funcs
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.linalg import LinearOperator, eigsh
+from sklearn.utils.extmath import randomized_svd
 from models.embedding.R2PCA import R2PCA_I
 
 __all__ = [
     "compute_full_pca",
+    "top_k_eigh",
+    "check_top_k_accuracy",
     "determine_K",
     "plot_scree",
     "rolling_r2pca",
+    "RollingPCAEngine",
+    "SlidingCovariance",
+    "subspace_eigh",
+    "batched_eigs",
+    "valid_window_ends",
     "plot_rolling_scores",
     "select_top_indicators",
+    "LoadingsStore",
+    "align_eigenbasis",
+    "BasisAligner",
     "compute_loading_share",
     "get_indicator_metadata"
 ]
 
+def top_k_eigh(
+    X: np.ndarray,
+    k: int,
+    solver: str = "lanczos",
+    random_state: int = 0
+) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Leading k eigenpairs of the sample covariance of X (T, M) without forming or fully
+    decomposing the M x M matrix:
+      - "lanczos": scipy eigsh on the implicit operator v -> Xc^T (Xc v) / (T-1), O(T M) per step
+      - "randomized": randomized range finder + SVD of the centred data (sklearn randomized_svd)
+      - "exact": eigvalsh/eigh of the full covariance, for reference
+    The total variance is the trace (sum of column variances), so ratios need no full spectrum.
+    Returns (eigvals (k,) descending, eigvecs (M, k), total_variance).
+    """
+    X = np.asarray(X, dtype=float)
+    n_samples, n_features = X.shape
+    Xc = X - X.mean(axis=0)
+    total = float((Xc ** 2).sum()) / (n_samples - 1)
+    k = min(k, n_features)
+
+    if solver == "exact" or (solver == "lanczos" and k >= n_features - 1):
+        eigvals, eigvecs = np.linalg.eigh(Xc.T @ Xc / (n_samples - 1))
+        return eigvals[::-1][:k], eigvecs[:, ::-1][:, :k], total
+    if solver == "lanczos":
+        operator = LinearOperator((n_features, n_features), dtype=float,
+                                  matvec=lambda v: Xc.T @ (Xc @ v) / (n_samples - 1))
+        v0 = np.random.default_rng(random_state).normal(size=n_features)
+        eigvals, eigvecs = eigsh(operator, k=k, which="LA", v0=v0)
+        order = np.argsort(eigvals)[::-1]
+        return eigvals[order], eigvecs[:, order], total
+    if solver == "randomized":
+        _, sing, Vt = randomized_svd(Xc, n_components=k, n_oversamples=10, n_iter=7, random_state=random_state)
+        return sing ** 2 / (n_samples - 1), Vt.T, total
+    raise ValueError(f"unknown solver {solver!r}, expected 'lanczos', 'randomized' or 'exact'")
+
+
+def check_top_k_accuracy(
+    X: np.ndarray,
+    k: int,
+    solver: str = "lanczos"
+) -> dict:
+    """
+    Compare a top-k solver with the exact decomposition: max relative eigenvalue error,
+    max principal-angle sine between the two k-dim subspaces, and the total-variance gap.
+    """
+    w, V, total = top_k_eigh(X, k, solver)
+    w_ref, V_ref, total_ref = top_k_eigh(X, k, "exact")
+    cosines = np.linalg.svd(V_ref.T @ V, compute_uv=False)
+    return {
+        "eigval_rel_error": float(np.max(np.abs(w - w_ref)) / w_ref[0]),
+        "subspace_sin": float(np.sqrt(max(0.0, 1 - cosines.min() ** 2))),
+        "total_var_error": abs(total - total_ref),
+    }
+
+
 def compute_full_pca(
     df: pd.DataFrame,
     pct_variance: float = 0.75,
-    hierarchical: bool = False
+    hierarchical: bool = False,
+    solver: str = "r2pca",
+    n_components: int = 20
 ) -> tuple[np.ndarray, float]:
     """
     Fit a full‑sample R2‑PCA to df, return (ratios, total_variance).
     ratios[i] = explained‐variance by PC (i+1) as fraction of total.
+    solver="lanczos"/"randomized" skips R2PCA_I and returns the plain-PCA ratios of only the
+    leading n_components PCs (top_k_eigh, total variance from the trace): O(M^2 K) instead of O(M^3).
     """
+    if solver != "r2pca":
+        eigs, _, total = top_k_eigh(df.to_numpy(dtype=float), n_components, solver)
+        return eigs / total, total
+
     pca = R2PCA_I(pct_variance=pct_variance, hierarchical=hierarchical)
     pca.fit(df, curr_names=list(df.columns))
     eigs = np.real(pca.val)
@@ -85,38 +167,346 @@ def plot_scree(
     plt.show()
 
 
-def rolling_r2pca(
-    df: pd.DataFrame,
+class SlidingCovariance:
+    """
+    Mean and scatter matrix of a fixed-length window of rows, moved forward one row at a time
+    with a rank-one downdate (row leaving) and a rank-one update (row entering): O(M^2) per
+    step instead of O(n M^2) for np.cov. The scatter is rebuilt from the window every
+    refresh_every steps to bound the accumulated rounding error.
+    """
+    def __init__(self, refresh_every: int = 250):
+        self.refresh_every = refresh_every
+        self.n = None
+        self.mean = None
+        self.scatter = None
+        self.n_updates = 0
+
+    def reset(self, window: np.ndarray):
+        window = np.asarray(window, dtype=float)
+        self.n = window.shape[0]
+        self.mean = window.mean(axis=0)
+        centered = window - self.mean
+        # Fortran order so BLAS ger updates it in place
+        self.scatter = np.asfortranarray(centered.T @ centered)
+        self.ger = get_blas_funcs("ger", (self.scatter,))
+        self.n_updates = 0
+
+    @property
+    def needs_refresh(self) -> bool:
+        return self.scatter is None or self.n_updates >= self.refresh_every
+
+    def slide(self, x_old: np.ndarray, x_new: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Drop x_old, add x_new; returns the two rank-one update directions."""
+        n = self.n
+        d_old = x_old - self.mean
+        mean_removed = self.mean - d_old / (n - 1)
+        d_new = x_new - mean_removed
+        self.mean = mean_removed + d_new / n
+        self.scatter = self.ger(-n / (n - 1), d_old, d_old, a=self.scatter, overwrite_a=True)
+        self.scatter = self.ger((n - 1) / n, d_new, d_new, a=self.scatter, overwrite_a=True)
+        self.n_updates += 1
+        return d_old, d_new
+
+    @property
+    def cov(self) -> np.ndarray:
+        return self.scatter / (self.n - 1)
+
+    @property
+    def total_variance(self) -> float:
+        return float(np.trace(self.scatter)) / (self.n - 1)
+
+
+def subspace_eigh(
+    cov: np.ndarray,
+    V0: np.ndarray,
+    n_converged: int | None = None,
+    max_iter: int = 100,
+    tol: float = 1e-6
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Leading eigenpairs of the symmetric matrix cov by subspace iteration with Rayleigh-Ritz,
+    started from the columns of V0 (M, p), e.g. the previous window's eigenvectors.
+    Stops once the first n_converged (default p) Ritz pairs have residual <= tol * largest eigenvalue.
+    Returned eigenvectors keep the sign of their starting column; with p > M only M pairs are returned. With tol=1e-6 the eigenvalues
+    are accurate to ~1e-8 relative (Ritz values converge quadratically in the residual).
+    Returns (eigvals (p,) descending, eigvecs (M, p), iterations).
+    """
+    n_converged = V0.shape[1] if n_converged is None else n_converged
+    V = V0
+    for it in range(1, max_iter + 1):
+        Q, _ = np.linalg.qr(cov @ V)
+        CQ = cov @ Q
+        w, U = np.linalg.eigh(Q.T @ CQ)
+        w, U = w[::-1], U[:, ::-1]
+        V = Q @ U
+        residual = np.linalg.norm(CQ @ U[:, :n_converged] - V[:, :n_converged] * w[:n_converged], axis=0)
+        if residual.max() <= tol * max(abs(w[0]), np.finfo(float).tiny):
+            break
+    signs = np.sign(np.einsum("mp,mp->p", V, V0[:, :V.shape[1]]))
+    return w, V * np.where(signs == 0, 1, signs), it
+
+
+def batched_eigs(
+    values: np.ndarray,
+    window_size: int,
+    window_ends: np.ndarray | None = None,
+    memory_budget: int = 256 * 2**20
+) -> np.ndarray:
+    """
+    Eigenvalues (descending) of the sample covariance of every trailing window of values (T, M),
+    one batched eigvalsh per chunk of windows instead of np.cov + eigvalsh per window.
+    Windows are read through a zero-copy sliding_window_view; window_ends (row index of each
+    window's last row, default all) selects which ones. When window_size < M the covariance has
+    rank < window_size, so the (window_size x window_size) Gram matrix is decomposed instead: same
+    non-zero eigenvalues, and only those min(window_size, M) are returned, shape (len(window_ends), min(n, M)).
+    Chunks are sized so the centred windows and their matrices stay within memory_budget bytes.
+    """
+    values = np.asarray(values, dtype=float)
+    n_rows, n_features = values.shape
+    window_ends = np.arange(window_size - 1, n_rows) if window_ends is None else np.asarray(window_ends)
+    windows = sliding_window_view(values, window_size, axis=0)  # (T - n + 1, M, n), no copy
+    side = min(window_size, n_features)
+
+    # one copy of the windows (the fancy index; centred in place), their matrices and
+    # eigvalsh's working copy of them
+    per_window = 8 * (n_features * window_size + 2 * side * side)
+    chunk = max(1, memory_budget // per_window)
+    eigs = np.empty((len(window_ends), side))
+    for lo in range(0, len(window_ends), chunk):
+        block = windows[window_ends[lo:lo + chunk] - window_size + 1]
+        block -= block.mean(axis=2, keepdims=True)
+        if window_size < n_features:
+            mats = np.swapaxes(block, 1, 2) @ block
+        else:
+            mats = block @ np.swapaxes(block, 1, 2)
+        del block
+        mats /= window_size - 1
+        eigs[lo:lo + chunk] = np.linalg.eigvalsh(mats)[:, ::-1]
+    return eigs
+
+
+class LoadingsStore:
+    """
+    Rolling loadings in one preallocated (W, K, M) tensor, float32 by default and optionally a
+    .npy memmap at path, plus a float64 running sum of |loadings| per indicator. It behaves like the
+    list of (K, M) arrays it replaces (len, indexing, iteration, np.stack), while
+    select_top_indicators / compute_loading_share read mean_abs() in O(M) without stacking.
+    """
+    def __init__(self, n_windows: int, K: int, n_features: int, path: str | None = None, dtype=np.float32):
+        shape = (n_windows, K, n_features)
+        if path is None:
+            self.data = np.empty(shape, dtype=dtype)
+        else:
+            self.data = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        self.abs_sum = np.zeros(n_features)
+        self.n = 0
+
+    def append(self, loadings: np.ndarray):
+        if self.n == self.data.shape[0]:
+            raise ValueError(f"LoadingsStore is full ({self.n} windows)")
+        self.data[self.n] = loadings
+        self.abs_sum += np.abs(loadings).sum(axis=0)
+        self.n += 1
+
+    @property
+    def tensor(self) -> np.ndarray:
+        """The filled (n, K, M) part of the tensor (a view)."""
+        return self.data[:self.n]
+
+    def mean_abs(self) -> np.ndarray:
+        """Average |loading| per indicator over windows and components."""
+        return self.abs_sum / (self.n * self.data.shape[1])
+
+    def flush(self):
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, idx):
+        return self.tensor[idx]
+
+    def __iter__(self):
+        return iter(self.tensor)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.tensor, dtype=dtype)
+
+
+def align_eigenbasis(prev: np.ndarray, curr: np.ndarray) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Match the rows of curr (K, M) to those of prev by a K×K assignment on |prev·currᵀ| (cosines).
+    Returns (perm, signs, overlap) such that signs[:, None] * curr[perm] is aligned to prev;
+    overlap is the mean matched |cosine| (1 = same basis).
+    """
+    C = prev @ curr.T
+    C /= np.outer(np.linalg.norm(prev, axis=1), np.linalg.norm(curr, axis=1)) + 1e-300
+    _, perm = linear_sum_assignment(-np.abs(C))
+    matched = C[np.arange(len(perm)), perm]
+    signs = np.where(matched < 0, -1.0, 1.0)
+    return perm, signs, float(np.abs(matched).mean())
+
+
+class BasisAligner:
+    """
+    Sink wrapper that aligns each window's loadings to the previous aligned window (sign and
+    order) before appending them to loadings_all, recording the per-window (perm, signs, overlap).
+    The first window is kept as is (overlap NaN). apply_scores() applies the same transforms to
+    the (W, K) scores; a LoadingsStore sink also gets the overlaps as store.overlap.
+    """
+    def __init__(self, loadings_all: list | LoadingsStore):
+        self.loadings_all = loadings_all
+        self.prev = None
+        self.perms, self.signs, self.overlap = [], [], []
+
+    def append(self, loadings: np.ndarray):
+        loadings = np.asarray(loadings, dtype=float)
+        if self.prev is None:
+            perm, signs, overlap = np.arange(len(loadings)), np.ones(len(loadings)), np.nan
+        else:
+            perm, signs, overlap = align_eigenbasis(self.prev, loadings)
+        self.prev = signs[:, None] * loadings[perm]
+        self.perms.append(perm)
+        self.signs.append(signs)
+        self.overlap.append(overlap)
+        self.loadings_all.append(self.prev)
+
+    def apply_scores(self, scores: list) -> np.ndarray:
+        scores = np.asarray(scores, dtype=float)
+        if len(scores):
+            scores = np.take_along_axis(scores, np.array(self.perms), axis=1) * np.array(self.signs)
+        return scores
+
+    def result(self) -> list | LoadingsStore:
+        if isinstance(self.loadings_all, LoadingsStore):
+            self.loadings_all.overlap = np.array(self.overlap)
+        return self.loadings_all
+
+
+def valid_window_ends(values: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Row positions end >= window_size whose trailing window values[end-window_size+1 : end+1]
+    has no NaN, from one cumulative count of NaN rows instead of a check per window.
+    (Like the original date loop, the first usable end is window_size, not window_size - 1.)
+    """
+    bad_rows = np.concatenate([[0], np.cumsum(np.isnan(values).any(axis=1))])
+    ends = np.arange(window_size, len(values))
+    return ends[bad_rows[ends + 1] == bad_rows[ends + 1 - window_size]]
+
+
+def _rolling_pca_incremental(
+    values: np.ndarray,
+    window_ends: np.ndarray,
     K: int,
-    window_size: int = 12,
-    hierarchical: bool = False
-) -> tuple[pd.DataFrame, list[np.ndarray], list[float], list[float], R2PCA_I]:
+    window_size: int,
+    oversample: int = 5,
+    refresh_every: int = 250,
+    loadings_all: list | LoadingsStore | None = None
+):
     """
-    Run rolling R2‑PCA over trailing windows of size window_size.
-    Returns:
-      - pc_ts: DataFrame of trailing-window PC scores (rows=date, cols=PC1..PCK)
-      - loadings_all: list of loading arrays of shape (K, M)
-      - eig_cumvar_list: list of plain PCA cumulative-variance shares in each window
-      - r2pca_cumvar_list: list of R2‑PCA reconstruction R² in each window
-      - last_model: the final R2PCA_I instance (for inspection)
+    Plain-PCA counterpart of the rolling R2PCA_I loop: SlidingCovariance for the window
+    covariance and subspace_eigh warm-started from the previous window's eigenvectors plus the
+    two update directions (for short windows that block already spans the whole range of the
+    covariance, so one iteration suffices). A window after a skipped (NaN) window is solved from scratch.
     """
-    from models.embedding.R2PCA import R2PCA_I
+    n_block = min(K + oversample, values.shape[1])
+
+    sliding = SlidingCovariance(refresh_every=refresh_every)
+    eigvecs = None
+    scores, cumvars = [], []
+    loadings_all = [] if loadings_all is None else loadings_all
+    prev_end = None
+
+    for end in window_ends:
+        start = end - window_size + 1
+        if prev_end != end - 1 or sliding.needs_refresh:
+            sliding.reset(values[start:end + 1])
+            directions = ()
+        else:
+            directions = sliding.slide(values[start - 1], values[end])
+
+        cov = sliding.cov
+        if prev_end != end - 1:
+            eigvals, eigvecs = np.linalg.eigh(cov)
+            eigvals, eigvecs = eigvals[::-1][:n_block], eigvecs[:, ::-1][:, :n_block]
+        else:
+            eigvals, eigvecs, _ = subspace_eigh(cov, np.column_stack([eigvecs, *directions]), n_converged=K)
+            eigvals, eigvecs = eigvals[:n_block], eigvecs[:, :n_block]
+        prev_end = end
+
+        loadings = eigvecs[:, :K].T
+        scores.append((values[end] - sliding.mean) @ loadings.T)
+        loadings_all.append(loadings.copy())
+        cumvars.append(float(eigvals[:K].sum() / sliding.total_variance))
+
+    return scores, loadings_all, cumvars
 
-    dates = df.index[window_size:]
-    scores, score_dates = [], []
-    loadings_all = []
-    eig_cumvar_list = []
-    r2pca_cumvar_list = []
-    last_model = None
 
-    for dt in dates:
-        win = df.loc[:dt].iloc[-window_size:].copy()
-        if win.isna().any().any():
-            continue
+# worker-side view of the indicator matrix published by _share_array
+_SHARED = {}
+
+
+def _share_array(arr: np.ndarray, order: str = "F") -> shared_memory.SharedMemory:
+    """Copy arr once into a shared-memory block that worker processes can map read-only."""
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf, order=order)[:] = arr
+    return shm
+
+
+def _attach_shared_array(name: str, shape: tuple, dtype: str, order: str = "F") -> None:
+    """Pool initializer: map the shared indicator matrix without copying it."""
+    shm = shared_memory.SharedMemory(name=name)
+    _SHARED["shm"] = shm
+    data = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order=order)
+    data.flags.writeable = False
+    _SHARED["data"] = data
+
+
+def _aligned_columns(values: np.ndarray, alignment: int = 64) -> np.ndarray:
+    """
+    values as a column-major (like a DataFrame block) float array starting on an alignment-byte
+    boundary, copied once if needed. NumPy's SIMD reductions depend on memory layout and
+    alignment, so the serial loop and the page-aligned shared-memory workers must see the same
+    layout to agree bit for bit.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.flags.f_contiguous and values.ctypes.data % alignment == 0:
+        return values
+    buf = np.empty(values.nbytes + alignment, dtype=np.uint8)
+    offset = (-buf.ctypes.data) % alignment
+    aligned = np.ndarray(values.shape, dtype=float, buffer=buf[offset:offset + values.nbytes], order="F")
+    aligned[...] = values
+    return aligned
+
+
+def _refit_windows(
+    window_ends: np.ndarray,
+    index: pd.Index,
+    columns: pd.Index,
+    K: int,
+    window_size: int,
+    hierarchical: bool,
+    values: np.ndarray | None = None,
+    loadings_all: list | LoadingsStore | None = None
+) -> tuple[list, list, list, R2PCA_I]:
+    """
+    Fit R2PCA_I on each window ending at window_ends (rows of values, or of the shared matrix
+    in a worker). Returns (scores, loadings, r2pca_cumvars, last model); loadings are appended
+    to loadings_all if given.
+    """
+    values = _SHARED["data"] if values is None else values
+    curr_names = list(columns)
+    scores, r2pca_cumvar_list = [], []
+    loadings_all = [] if loadings_all is None else loadings_all
+    last_model = None
+    for end in window_ends:
+        start = end - window_size + 1
+        win = pd.DataFrame(values[start:end + 1], index=index[start:end + 1], columns=columns, copy=False)
 
         # 1) fit R2‑PCA
         mdl = R2PCA_I(n_components=K, pct_variance=None, hierarchical=hierarchical)
-        mdl.fit(win, curr_names=list(win.columns))
+        mdl.fit(win, curr_names=curr_names)
         last_model = mdl
 
         # 2) record the last‑month PC scores
@@ -124,28 +514,220 @@ def rolling_r2pca(
         if Xr.ndim == 3:
             Xr = Xr[:, :, 0]
         scores.append(Xr[-1, :K])
-        score_dates.append(dt)
 
         # 3) record the loadings
         loadings_all.append(mdl.prev_eigenvectors_[:K, :])
 
-        # 4) plain‐PCA cumulative variance
-        cov = np.cov(win.values, rowvar=False)
-        eigs = np.linalg.eigvalsh(cov)[::-1]
-        eig_cumvar_list.append(eigs[:K].sum() / eigs.sum())
-
-        # 5) R2‑PCA’s own reconstruction R²
+        # 4) R2‑PCA’s own reconstruction R²
         #    'mdl.current_variance' is set in fit() by accumulating the chosen eigenvalues
         r2pca_cumvar_list.append(float(mdl.current_variance))
+    return scores, loadings_all, r2pca_cumvar_list, last_model
 
-    # build the score DataFrame
-    pc_ts = pd.DataFrame(
-        scores,
-        index=score_dates,
-        columns=[f"PC{i+1}" for i in range(K)]
-    )
 
-    return pc_ts, loadings_all, eig_cumvar_list, r2pca_cumvar_list, last_model
+class _DiscardSink:
+    """Loadings sink for engines run without the "loadings" output."""
+    def append(self, loadings: np.ndarray):
+        pass
+
+
+class RollingPCAEngine:
+    """
+    Rolling-window PCA over trailing windows of size window_size, the single implementation behind
+    both rolling_r2pca functions. Pluggable parts:
+      - strategy: "refit" (a fresh R2PCA_I per window, n_jobs > 1 shards the windows across worker
+        processes with identical results) or "incremental" (SlidingCovariance + warm-started
+        subspace_eigh, i.e. plain PCA of each window).
+      - eig_solver: the plain-PCA diagnostics of the refit strategy, "exact" (batched_eigs) or a
+        top_k_eigh solver ("lanczos"/"randomized"), used per window only when window_size >= M;
+        shorter windows always take the batched Gram path.
+      - outputs: any of "scores", "loadings", "variance", "model"; what is not requested is not
+        computed or kept (e.g. no loadings buffer, no diagnostics pass, no final-window model).
+      - loadings_store/loadings_path: LoadingsStore sink instead of a list; align: BasisAligner.
+    ±inf is treated as missing; windows with any missing value are skipped.
+    fit(df) sets scores_ (pc_ts), loadings_, eig_cumvar_, r2pca_cumvar_, last_model_,
+    window_ends_ and, with align, overlap_ (per-window Series; unrequested outputs are None).
+    """
+    STRATEGIES = ("refit", "incremental")
+    OUTPUTS = ("scores", "loadings", "variance", "model")
+
+    def __init__(
+        self,
+        K: int,
+        window_size: int = 12,
+        hierarchical: bool = False,
+        method: str = "refit",
+        eig_solver: str = "exact",
+        n_jobs: int = 1,
+        outputs: tuple = OUTPUTS,
+        loadings_store: bool = False,
+        loadings_path: str | None = None,
+        align: bool = False
+    ):
+        if method not in self.STRATEGIES:
+            raise ValueError(f"unknown method {method!r}, expected 'refit' or 'incremental'")
+        unknown = set(outputs) - set(self.OUTPUTS)
+        if unknown:
+            raise ValueError(f"unknown outputs {sorted(unknown)}, expected a subset of {self.OUTPUTS}")
+        self.K = K
+        self.window_size = window_size
+        self.hierarchical = hierarchical
+        self.method = method
+        self.eig_solver = eig_solver
+        self.n_jobs = n_jobs
+        self.outputs = tuple(outputs)
+        self.loadings_store = loadings_store
+        self.loadings_path = loadings_path
+        self.align = align
+
+    def _sink(self, n_windows: int, n_features: int):
+        if "loadings" not in self.outputs:
+            return _DiscardSink()
+        if self.loadings_store or self.loadings_path is not None:
+            return LoadingsStore(n_windows, self.K, n_features, path=self.loadings_path)
+        return []
+
+    def fit(self, df: pd.DataFrame) -> "RollingPCAEngine":
+        values = df.to_numpy(dtype=float, copy=True)
+        values[np.isinf(values)] = np.nan
+        return self.fit_values(values, df.index, df.columns)
+
+    def fit_values(self, values: np.ndarray, index: pd.Index, columns: pd.Index) -> "RollingPCAEngine":
+        """
+        Fit on a NaN-cleaned array: valid windows come from one precomputed mask and are zero-copy
+        row slices; R2PCA_I gets them wrapped (not copied) in a DataFrame.
+        """
+        window_ends = valid_window_ends(values, self.window_size)
+        values = _aligned_columns(values)
+        sink = self._sink(len(window_ends), values.shape[1])
+        aligner = BasisAligner(sink) if self.align else None
+
+        if self.method == "incremental":
+            scores, eig_cumvar, r2pca_cumvar, last_model = self._fit_incremental(
+                values, window_ends, index, columns, aligner or sink)
+        else:
+            scores, r2pca_cumvar, last_model = self._fit_refit(values, window_ends, index, columns, aligner or sink)
+            eig_cumvar = self.diagnostics(values, window_ends) if "variance" in self.outputs else None
+
+        if aligner is not None:
+            scores = aligner.apply_scores(scores)
+            sink = aligner.result()
+
+        self.window_ends_ = window_ends
+        self.overlap_ = None
+        if aligner is not None:
+            self.overlap_ = pd.Series(aligner.overlap, index=index[window_ends], name="overlap", dtype=float)
+        self.scores_ = None
+        if "scores" in self.outputs:
+            self.scores_ = pd.DataFrame(scores, index=index[window_ends], columns=[f"PC{i+1}" for i in range(self.K)])
+            if aligner is not None:
+                self.scores_.attrs["overlap"] = self.overlap_
+        self.loadings_ = sink if "loadings" in self.outputs else None
+        variance = "variance" in self.outputs
+        self.eig_cumvar_ = eig_cumvar if variance else None
+        self.r2pca_cumvar_ = r2pca_cumvar if variance else None
+        self.last_model_ = last_model if "model" in self.outputs else None
+        return self
+
+    def _fit_incremental(self, values, window_ends, index, columns, sink):
+        scores, _, eig_cumvar = _rolling_pca_incremental(
+            values, window_ends, self.K, self.window_size, loadings_all=sink)
+        last_model = None
+        if "model" in self.outputs and len(window_ends):
+            end = window_ends[-1]
+            rows = slice(end - self.window_size + 1, end + 1)
+            win = pd.DataFrame(values[rows], index=index[rows], columns=columns, copy=False)
+            last_model = R2PCA_I(n_components=self.K, pct_variance=None, hierarchical=self.hierarchical)
+            last_model.fit(win, curr_names=list(columns))
+        return scores, eig_cumvar, list(eig_cumvar), last_model
+
+    def _fit_refit(self, values, window_ends, index, columns, sink):
+        """
+        With n_jobs > 1 the windows are split into n_jobs contiguous shards in date order, fitted by
+        worker processes that map values from shared memory, and concatenated back in shard order,
+        so the outputs are identical to the serial loop.
+        """
+        args = (index, columns, self.K, self.window_size, self.hierarchical)
+        if self.n_jobs <= 1 or len(window_ends) <= 1:
+            scores, _, r2pca_cumvar, last_model = _refit_windows(window_ends, *args, values=values, loadings_all=sink)
+            return scores, r2pca_cumvar, last_model
+
+        shards = [shard for shard in np.array_split(window_ends, self.n_jobs) if len(shard)]
+        shm = _share_array(values)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(shards),
+                initializer=_attach_shared_array,
+                initargs=(shm.name, values.shape, values.dtype.str)
+            ) as pool:
+                results = list(pool.map(_refit_windows, shards, *[[arg] * len(shards) for arg in args]))
+        finally:
+            shm.close()
+            shm.unlink()
+        for result in results:
+            for loadings in result[1]:
+                sink.append(loadings)
+        scores = [score for result in results for score in result[0]]
+        r2pca_cumvar = [cumvar for result in results for cumvar in result[2]]
+        return scores, r2pca_cumvar, results[-1][3]
+
+    def diagnostics(self, values: np.ndarray, window_ends: np.ndarray) -> list[float]:
+        """
+        Plain-PCA cumulative variance share of the top K per window. Windows shorter than M go
+        through batched_eigs (window_size × window_size Grams) whatever the eig_solver; a
+        top_k_eigh solver only replaces it for windows of at least M rows.
+        """
+        if self.eig_solver != "exact" and self.window_size >= values.shape[1]:
+            cumvar = []
+            for end in window_ends:
+                eigs, _, total = top_k_eigh(values[end - self.window_size + 1:end + 1], self.K, self.eig_solver)
+                cumvar.append(float(eigs.sum() / total))
+            return cumvar
+        if not len(window_ends):
+            return []
+        eigs = batched_eigs(values, self.window_size, window_ends)
+        return list(eigs[:, :self.K].sum(axis=1) / eigs.sum(axis=1))
+
+
+def rolling_r2pca(
+    df: pd.DataFrame,
+    K: int,
+    window_size: int = 12,
+    hierarchical: bool = False,
+    method: str = "refit",
+    eig_solver: str = "exact",
+    n_jobs: int = 1,
+    loadings_store: bool = False,
+    loadings_path: str | None = None,
+    align: bool = False
+) -> tuple[pd.DataFrame, list[np.ndarray], list[float], list[float], R2PCA_I]:
+    """
+    Run rolling R2‑PCA over trailing windows of size window_size (a RollingPCAEngine run).
+    method="refit" fits a fresh R2PCA_I on every window. method="incremental" tracks the window
+    covariance with SlidingCovariance and warm-starts its top-K eigenvectors from the previous
+    window (subspace_eigh), so loadings/scores are those of plain PCA of the window; r2pca_cumvar
+    then equals eig_cumvar and last_model is an R2PCA_I fitted on the final window only.
+    eig_solver: "exact" (batched_eigs) or a top_k_eigh solver ("lanczos"/"randomized") for the
+    plain-PCA eig_cumvar of the refit method, used only when window_size >= M (shorter windows
+    keep the batched Gram path of batched_eigs).
+    n_jobs > 1 fits the refit windows in worker processes (contiguous date shards, data in shared
+    memory) with results identical to n_jobs=1; the incremental method is sequential by nature.
+    loadings_store=True (or a loadings_path for a disk-backed .npy memmap) returns loadings_all as
+    a LoadingsStore: one float32 (W, K, M) tensor plus a running |loading| sum.
+    align=True matches each window's PCs to the previous window's (sign flips and reordering via
+    align_eigenbasis) as windows are produced, applies the same to the scores, and stores the
+    per-window overlap in pc_ts.attrs["overlap"] (also RollingPCAEngine.overlap_, and
+    store.overlap for a LoadingsStore).
+    ±inf is treated as missing; windows with missing values are skipped.
+    Returns:
+      - pc_ts: DataFrame of trailing-window PC scores (rows=date, cols=PC1..PCK)
+      - loadings_all: list of loading arrays of shape (K, M), or a LoadingsStore
+      - eig_cumvar_list: list of plain PCA cumulative-variance shares in each window
+      - r2pca_cumvar_list: list of R2‑PCA reconstruction R² in each window
+      - last_model: the final R2PCA_I instance (for inspection)
+    """
+    engine = RollingPCAEngine(K, window_size, hierarchical, method, eig_solver, n_jobs,
+                              loadings_store=loadings_store, loadings_path=loadings_path, align=align).fit(df)
+    return engine.scores_, engine.loadings_, engine.eig_cumvar_, engine.r2pca_cumvar_, engine.last_model_
 
 
 
@@ -171,16 +753,20 @@ def plot_rolling_scores(
 
 
 def select_top_indicators(
-    loadings_all: list[np.ndarray],
+    loadings_all: list[np.ndarray] | LoadingsStore,
     feature_names: list[str],
     top_N: int = 8
 ) -> pd.DataFrame:
     """
     Compute AvgAbsLoading over (windows×components) and return
     a DataFrame sorted desc with columns ['Indicator','AvgAbsLoading'].
+    A LoadingsStore answers from its running |loading| sum without stacking.
     """
-    L = np.stack(loadings_all)       # shape (W, K, M)
-    avg = np.mean(np.abs(L), axis=(0,1))
+    if isinstance(loadings_all, LoadingsStore):
+        avg = loadings_all.mean_abs()
+    else:
+        L = np.stack(loadings_all)       # shape (W, K, M)
+        avg = np.mean(np.abs(L), axis=(0,1))
     df = pd.DataFrame({
         "Indicator": feature_names,
         "AvgAbsLoading": avg
@@ -189,12 +775,16 @@ def select_top_indicators(
 
 
 def compute_loading_share(
-    loading_df: pd.DataFrame,
+    loading_df: pd.DataFrame | LoadingsStore,
     top_n: int = 8
 ) -> float:
     """
     Returns fraction of total |loading| mass captured by the top_n rows.
+    Also accepts a LoadingsStore directly (top_n indicators by average |loading|, O(M)).
     """
+    if isinstance(loading_df, LoadingsStore):
+        mass = loading_df.mean_abs()
+        return np.partition(mass, len(mass) - top_n)[-top_n:].sum() / mass.sum()
     total_mass = loading_df["AvgAbsLoading"].sum()
     top_mass   = loading_df["AvgAbsLoading"].iloc[:top_n].sum()
     return top_mass / total_mass
@@ -1,10 +1,17 @@
 # r2rd_utils.py
 
+import os
+import copy
+import time
+import pickle
+import hashlib
 import pandas as pd
 import numpy as np
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
-from models.HMMs.r2_gaussian_hmm import R2GaussianHMM
+from models.HMMs.r2_gaussian_hmm import R2GaussianHMM, RegimeSnapshotArchive, FitProfiler
 import math
 import matplotlib.pyplot as plt
 from matplotlib.ticker import MaxNLocator
@@ -12,11 +19,13 @@ from matplotlib.ticker import MaxNLocator
 
 __all__ = [
     "prepare_regime_data",
+    "FitCache",
     "compute_bic_scores",
     "select_best_k",
     "plot_bic_scores",
     "warm_start_hmm",
     "rolling_oos_ll",
+    "run_cv_grid",
     "compute_cv_scores",
     "select_best_k_cv",
     "select_best_k_combined",
@@ -58,31 +67,209 @@ def prepare_regime_data(
 
     return df, scaler
 
+# worker-side view of the training array published by _share_array
+_SHARED = {}
+
+
+def _array_digest(arr: np.ndarray) -> str:
+    """Content hash of an array (values, shape and dtype), used as a cache key."""
+    arr = np.ascontiguousarray(arr)
+    h = hashlib.sha1(arr.tobytes())
+    h.update(str((arr.shape, arr.dtype.str)).encode())
+    return h.hexdigest()
+
+
+def _share_array(arr: np.ndarray) -> shared_memory.SharedMemory:
+    """Copy arr once into a shared-memory block that worker processes can map read-only."""
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+    return shm
+
+
+def _attach_shared_array(name: str, shape: tuple, dtype: str) -> None:
+    """Pool initializer: map the shared training array without copying it."""
+    shm = shared_memory.SharedMemory(name=name)
+    _SHARED["shm"] = shm
+    data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    data.flags.writeable = False
+    _SHARED["data"] = data
+
+
+# EM settings shared by compute_bic_scores, the CV grid and warm_start_hmm, so their cold fits
+# on the same slice share FitCache entries
+HMM_N_ITER = 1000
+HMM_TOL = 1e-5
+
+# R2GaussianHMM options that decide what a fit produces (always keyed), and the warm-start
+# options that only matter for refits continuing from a parent fit
+FIT_OPTIONS = ("n_components", "covariance_type", "n_iter", "tol", "n_init", "random_state",
+               "shrinkage", "low_memory", "dtype")
+WARM_OPTIONS = ("warm_start", "warm_start_tol")
+
+
+class FitCache:
+    """
+    Content-addressed store of fitted R2GaussianHMMs shared by compute_bic_scores,
+    run_cv_grid / compute_cv_scores and warm_start_hmm. Keys hash the training slice, the
+    model's fit options and, for warm-start refits, the parent fit's key; entries live in
+    memory and, with cache_dir, are pickled to disk. Each entry point reports its hits
+    (fits served) and misses (fits computed), also kept in self.reports.
+    """
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.reports = []
+
+    def key(self, data: np.ndarray, model: R2GaussianHMM, parent: str | None = None) -> str:
+        """Key of fitting model (unfitted, or as it is about to be refitted) on data."""
+        names = FIT_OPTIONS + (WARM_OPTIONS if parent is not None else ())
+        options = [np.dtype(model.dtype).str if name == "dtype" else getattr(model, name) for name in names]
+        spec = f"{_array_digest(data)}|{options!r}|{parent}"
+        return hashlib.sha1(spec.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"fit_{key}.pkl")
+
+    def get(self, key: str, model: R2GaussianHMM) -> R2GaussianHMM | None:
+        """
+        Return a private copy of the cached model, or None. The copy takes model's warm-start
+        options, which a cold entry (keyed without them) may have been stored with differently.
+        """
+        if key not in self.entries and self.cache_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), "rb") as f:
+                self.entries[key] = pickle.load(f)
+        if key not in self.entries:
+            return None
+        self.hits += 1
+        cached = copy.deepcopy(self.entries[key][0])
+        for name in WARM_OPTIONS:
+            setattr(cached, name, getattr(model, name))
+        return cached
+
+    def fit_time(self, key: str) -> float:
+        return self.entries[key][1]
+
+    def put(self, key: str, model: R2GaussianHMM, fit_time: float = float("nan")) -> None:
+        self.misses += 1
+        self.entries[key] = (copy.deepcopy(model), fit_time)
+        if self.cache_dir is not None:
+            with open(self._path(key), "wb") as f:
+                pickle.dump(self.entries[key], f)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else float("nan"),
+            "entries": len(self.entries),
+        }
+
+    def report(self, step: str, since: tuple[int, int]) -> dict:
+        """Print and record the hits/misses of one entry point call, counted from since=(hits, misses)."""
+        rec = {"step": step, "hits": self.hits - since[0], "misses": self.misses - since[1]}
+        self.reports.append(rec)
+        print(f"→ FitCache [{step}]: {rec['hits']} hits, {rec['misses']} misses "
+              f"(total {self.hits} hits / {self.misses} misses)")
+        return rec
+
+    def __repr__(self):
+        return f"FitCache({self.stats()})"
+
+
+def _fit_bic_k(k: int, n_iter: int, tol: float, data: np.ndarray | None = None) -> tuple[int, float, float, R2GaussianHMM]:
+    """Fit one K of the BIC grid; returns (k, log-likelihood, fit wall-time in seconds, model)."""
+    data = _SHARED["data"] if data is None else data
+    start = time.perf_counter()
+    model_k = R2GaussianHMM(n_components=k, n_iter=n_iter, tol=tol)
+    model_k.fit(data)
+    ll = model_k.model.score(data)
+    return k, ll, time.perf_counter() - start, model_k
+
+
 def compute_bic_scores(
     df_scaled_regime: pd.DataFrame,
     train_end: str,
     k_min: int = 2,
-    k_max: int = 10
-) -> dict[int,float]:
+    k_max: int = 10,
+    n_jobs: int = 1,
+    cache_dir: str | None = None,
+    return_fit_times: bool = False,
+    cache: FitCache | None = None,
+    n_iter: int = HMM_N_ITER,
+    tol: float = HMM_TOL
+) -> dict[int,float] | tuple[dict[int,float], dict[int,float]]:
     """
     Fit R2GaussianHMM for k in [k_min..k_max] on the slice up to train_end,
     compute BIC_k = -2*LL + p*ln(N). Returns {k: BIC_k}.
+    - n_jobs > 1 fits the K grid concurrently; workers map the training array
+      from shared memory instead of receiving a pickled copy.
+    - cache: a FitCache consulted for (and filled with) the fitted models, so re-runs
+      (or a larger k_max) only fit the missing K; cache_dir is shorthand for
+      FitCache(cache_dir) when no cache is given.
+    - return_fit_times=True also returns {k: fit wall-time in seconds};
+      for cached K this is the time recorded when it was fitted.
+    - n_iter/tol: EM settings (part of the cache key).
     """
-    data = df_scaled_regime.loc[:train_end].values
+    if cache is None and cache_dir is not None:
+        cache = FitCache(cache_dir)
+    data = np.ascontiguousarray(df_scaled_regime.loc[:train_end].values)
     N, d = data.shape
 
     def num_params(k,d): 
         return (k-1) + k*(k-1) + 2*k*d
 
+    lls, fit_times = {}, {}
+    todo = list(range(k_min, k_max+1))
+    templates = {k: R2GaussianHMM(n_components=k, n_iter=n_iter, tol=tol) for k in todo}
+    if cache is not None:
+        since = (cache.hits, cache.misses)
+        for k in list(todo):
+            key = cache.key(data, templates[k])
+            model_k = cache.get(key, templates[k])
+            if model_k is not None:
+                lls[k], fit_times[k] = model_k.model.score(data), cache.fit_time(key)
+                todo.remove(k)
+
+    def record(k, ll, fit_time, model_k):
+        lls[k], fit_times[k] = ll, fit_time
+        if cache is not None:
+            cache.put(cache.key(data, templates[k]), model_k, fit_time)
+
+    if n_jobs > 1 and len(todo) > 1:
+        shm = _share_array(data)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_attach_shared_array,
+                initargs=(shm.name, data.shape, data.dtype.str)
+            ) as pool:
+                # largest K first: it takes longest
+                futures = [pool.submit(_fit_bic_k, k, n_iter, tol) for k in sorted(todo, reverse=True)]
+                for fut in as_completed(futures):
+                    record(*fut.result())
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        for k in todo:
+            record(*_fit_bic_k(k, n_iter, tol, data=data))
+
     bic_scores = {}
     for k in range(k_min, k_max+1):
-        model_k = R2GaussianHMM(n_components=k, n_iter=1000, tol=1e-5)
-        model_k.fit(data)
-        ll  = model_k.model.score(data)
+        ll  = lls[k]
         p   = num_params(k, d)
         bic = -2 * ll + p * math.log(N)
         bic_scores[k] = bic
+    if cache is not None:
+        cache.report("BIC", since)
 
+    if return_fit_times:
+        return bic_scores, {k: fit_times[k] for k in bic_scores}
     return bic_scores
 
 def select_best_k(bic_scores: dict[int,float]) -> int:
@@ -104,41 +291,97 @@ def plot_bic_scores(bic_scores: dict[int,float]) -> None:
 def warm_start_hmm(
     df_scaled_regime: pd.DataFrame,
     K: int,
-    start_length: int = 24
+    start_length: int = 24,
+    incremental: bool = False,
+    partial_n_iter: int = 10,
+    cache: FitCache | None = None,
+    snapshot_path: str | None = None,
+    profiler: FitProfiler | None = None,
+    n_iter: int = HMM_N_ITER,
+    tol: float = HMM_TOL
 ) -> tuple[pd.DataFrame, R2GaussianHMM]:
     """
     1) Warm‑up fit on first start_length observations,
     2) Rolling re‑fit (warm start) and one‑step smoothing:
        produce posterior P1..PK and decoded RegimeLabel.
+    With incremental=True the rolling step uses R2GaussianHMM.partial_fit instead of a
+    full refit on df.loc[:t]: the EM sufficient statistics are carried forward and at most
+    partial_n_iter EM iterations are run on the new observation only.
+    With a FitCache, the warm-up fit and each rolling refit are looked up before fitting; cold
+    refits share entries with compute_bic_scores / the CV grid on the same slice, and a hit
+    only re-runs the label matching.
+    With snapshot_path, the model after each date is written to a RegimeSnapshotArchive
+    there (keyed by date), readable one window at a time.
+    With a FitProfiler, every fit (or partial_fit) records its stage timings tagged with
+    the date ("warmup" for the first fit); cache hits record nothing.
     Returns (df_probs, fitted_model).
     """
-    model = R2GaussianHMM(n_components=K, n_iter=1000, tol=1e-5)
+    model = R2GaussianHMM(n_components=K, n_iter=n_iter, tol=tol,
+                          incremental=incremental, partial_n_iter=partial_n_iter, profiler=profiler)
+    if profiler is not None:
+        profiler.tag(date="warmup")
 
     # warm‑up
     warm_X = df_scaled_regime.iloc[:start_length].values
-    model.fit(warm_X)
+    key = None
+    cached = None
+    if cache is not None:
+        since = (cache.hits, cache.misses)
+        key = cache.key(warm_X, model)
+        cached = cache.get(key, model)
+    if cached is None:
+        model.fit(warm_X)
+        if cache is not None:
+            cache.put(key, model)
+    else:
+        model.adopt_fit(cached)
+        if incremental:
+            model.init_incremental_state(warm_X, model.scaler.transform(warm_X))
 
     from collections import deque
     import numpy as np
 
     # rolling inference
     records = []
-    cost_buffer = deque([-model.model.score(x.reshape(1,-1)) 
-                         for x in warm_X[-12:]], maxlen=12)
-
-    for t in df_scaled_regime.index[start_length:]:
-        chunk = df_scaled_regime.loc[:t].values
-        model.fit(chunk)  # warm‑start
-        post = model.transform(chunk)
-        probs = post[-1] if not hasattr(post, "iloc") else post.iloc[-1].values
+    snapshots = []
+    cost_buffer = deque(-model.score_observations(warm_X[-12:])[0], maxlen=12)
+
+    for pos, t in enumerate(df_scaled_regime.index[start_length:], start=start_length):
+        if profiler is not None:
+            profiler.tag(date=t)
+        if incremental:
+            x_t = df_scaled_regime.values[pos:pos+1]
+            probs = model.partial_fit(x_t)[-1]
+        else:
+            chunk = df_scaled_regime.loc[:t].values
+            cached = None
+            if cache is not None:
+                # a cold refit does not depend on the previous fit, only a warm one chains on it
+                key = cache.key(chunk, model, parent=key if model.warm_start else None)
+                cached = cache.get(key, model)
+            if cached is None:
+                model.fit(chunk)  # warm‑start
+                if cache is not None:
+                    cache.put(key, model)
+            else:
+                model.adopt_fit(cached)
+            post = model.transform(chunk)
+            probs = post[-1] if not hasattr(post, "iloc") else post.iloc[-1].values
+            x_t = chunk[-1:]
         label = int(np.argmax(probs)) + 1
         records.append({**{f"P{i+1}": probs[i] for i in range(K)},
                         "RegimeLabel": label,
                         "Date": t})
+        if snapshot_path is not None:
+            snapshots.append(copy.deepcopy(model.to_arrays()))
         # update cost buffer (optional surprise detection)
-        cost_buffer.append(-model.model.score(chunk[-1].reshape(1,-1)))
+        cost_buffer.append(-model.score_observations(x_t[-1:])[0][0])
 
     df_probs = pd.DataFrame(records).set_index("Date")
+    if snapshot_path is not None:
+        RegimeSnapshotArchive.write(snapshot_path, snapshots, keys=list(df_probs.index))
+    if cache is not None:
+        cache.report("warm_start_hmm", since)
     return df_probs, model
 
 def get_regime_change_dates(
@@ -174,33 +417,182 @@ def plot_regime_labels(
 # STEP 2.3.5: Rolling‑Window CV for K Selection & Combine with BIC
 # -----------------------------------------------------------------------------
 
-def rolling_oos_ll(
+def _cv_fold_starts(
     df_scaled_regime: pd.DataFrame,
-    k: int,
     initial_train: str,
-    test_horizon: int = 12,
-    step: int = 12
-) -> float:
+    test_horizon: int,
+    step: int
+) -> list[int]:
     """
-    Train HMM with `k` states on data up to each fold point, then test on the next
-    `test_horizon` observations. Slides forward by `step`. Returns mean cum‑LL.
+    Row positions where each CV fold's test window starts. The first fold trains on
+    .loc[:initial_train] (inclusive, like compute_bic_scores' train_end slice).
     """
-    # find first index location on or after initial_train
     initial_dt = pd.to_datetime(initial_train)
-    idx0 = df_scaled_regime.index.searchsorted(initial_dt)
+    idx0 = df_scaled_regime.index.searchsorted(initial_dt, side="right")
     n   = len(df_scaled_regime)
-    oos_lls = []
-    for start in range(idx0, n - test_horizon, step):
-        train_arr = df_scaled_regime.iloc[:start].values
-        test_arr  = df_scaled_regime.iloc[start:start+test_horizon].values
+    return list(range(idx0, n - test_horizon, step))
 
-        mdl = R2GaussianHMM(n_components=k, n_iter=500, tol=1e-4)
-        mdl.fit(train_arr)
+
+def _fit_cv_chain(
+    k: int,
+    fold_starts: list[int],
+    test_horizon: int,
+    warm_start: bool,
+    n_iter: int,
+    tol: float,
+    init_model: R2GaussianHMM | None = None,
+    return_models: bool = False,
+    data: np.ndarray | None = None
+) -> list[tuple[int, int, float, R2GaussianHMM | None]]:
+    """
+    Run the given folds of one K in order; returns [(k, start, oos_ll, model), ...]
+    (model is a copy of the fold's fit if return_models, else None).
+    With warm_start the same R2GaussianHMM (built with warm_start=True) is refitted fold
+    after fold, starting from init_model if given: EM starts from the previous fold's means,
+    covariances, transition matrix and start probabilities instead of re-clustering.
+    Otherwise each fold starts from scratch.
+    """
+    data = _SHARED["data"] if data is None else data
+    results = []
+    mdl = init_model
+    if mdl is not None and warm_start:
+        # a model resumed from the cache may have been fitted cold
+        mdl.warm_start = True
+    for start in fold_starts:
+        if mdl is None or not warm_start:
+            mdl = R2GaussianHMM(n_components=k, n_iter=n_iter, tol=tol, warm_start=warm_start)
+        mdl.fit(data[:start])
 
         # sum per‑point log‑likelihood on test window
-        ll = sum(mdl.model.score(x.reshape(1,-1)) for x in test_arr)
-        oos_lls.append(ll)
+        ll = mdl.score_observations(data[start:start+test_horizon])[0].sum()
+        results.append((k, start, ll, copy.deepcopy(mdl) if return_models else None))
+    return results
+
+
+def run_cv_grid(
+    df_scaled_regime: pd.DataFrame,
+    ks: list[int],
+    initial_train: str,
+    test_horizon: int = 12,
+    step: int = 12,
+    n_jobs: int = 1,
+    warm_start: bool = False,
+    on_result=None,
+    n_iter: int = HMM_N_ITER,
+    tol: float = HMM_TOL,
+    cache: FitCache | None = None
+) -> dict[int, list[float]]:
+    """
+    Expand the (K, fold) grid and run it on a pool of n_jobs worker processes, longest
+    tasks first (cost ~ K² × training length). Workers map the data from shared memory.
+    - warm_start: folds of the same K run as one chain, each fold's EM starting from the
+      previous fold's parameters (R2GaussianHMM warm_start); chains of different K still
+      run in parallel.
+    - on_result(k, date, oos_ll) is called as each fold finishes, for streaming progress.
+    - cache: a FitCache; cached folds are only scored, and a warm-start chain resumes
+      after its last cached fold.
+    Returns {k: [oos_ll per fold, in fold order]}.
+    """
+    data = np.ascontiguousarray(df_scaled_regime.values)
+    fold_starts = _cv_fold_starts(df_scaled_regime, initial_train, test_horizon, step)
+
+    # (k, starts, model to continue from, cache key of that model)
+    if warm_start:
+        tasks = [(k, fold_starts, None, None) for k in ks]
+    else:
+        tasks = [(k, [start], None, None) for k in ks for start in fold_starts]
+
+    lls = {k: {} for k in ks}
+    templates = {k: R2GaussianHMM(n_components=k, n_iter=n_iter, tol=tol, warm_start=warm_start) for k in ks}
+
+    def record(k, chain_results, parent):
+        for _, start, ll, model in chain_results:
+            lls[k][start] = ll
+            if cache is not None:
+                key = cache.key(data[:start], templates[k], parent=parent if warm_start else None)
+                if model is not None:
+                    cache.put(key, model)
+                parent = key
+            if on_result is not None:
+                on_result(k, df_scaled_regime.index[start], ll)
+
+    if cache is not None:
+        since = (cache.hits, cache.misses)
+        pending = []
+        for k, starts, init_model, parent in tasks:
+            starts = list(starts)
+            while starts:
+                key = cache.key(data[:starts[0]], templates[k], parent=parent if warm_start else None)
+                cached = cache.get(key, templates[k])
+                if cached is None:
+                    break
+                ll = cached.score_observations(data[starts[0]:starts[0]+test_horizon])[0].sum()
+                record(k, [(k, starts.pop(0), ll, None)], parent)
+                init_model, parent = cached, key
+            if starts:
+                pending.append((k, starts, init_model, parent))
+        tasks = pending
+    tasks.sort(key=lambda task: task[0] ** 2 * sum(task[1]), reverse=True)
+
+    return_models = cache is not None
+    if n_jobs > 1 and len(tasks) > 1:
+        shm = _share_array(data)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_attach_shared_array,
+                initargs=(shm.name, data.shape, data.dtype.str)
+            ) as pool:
+                futures = {
+                    pool.submit(_fit_cv_chain, k, starts, test_horizon, warm_start, n_iter, tol,
+                                init_model, return_models): (k, parent)
+                    for k, starts, init_model, parent in tasks
+                }
+                for fut in as_completed(futures):
+                    k, parent = futures[fut]
+                    record(k, fut.result(), parent)
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        for k, starts, init_model, parent in tasks:
+            record(k, _fit_cv_chain(k, starts, test_horizon, warm_start, n_iter, tol,
+                                    init_model, return_models, data=data), parent)
+
+    if cache is not None:
+        cache.report("CV", since)
+    return {k: [lls[k][start] for start in fold_starts] for k in ks}
+
 
+def rolling_oos_ll(
+    df_scaled_regime: pd.DataFrame,
+    k: int,
+    initial_train: str,
+    test_horizon: int = 12,
+    step: int = 12,
+    n_jobs: int = 1,
+    warm_start: bool = False,
+    cache: FitCache | None = None,
+    n_iter: int = HMM_N_ITER,
+    tol: float = HMM_TOL
+) -> float:
+    """
+    Train HMM with `k` states on data up to each fold point, then test on the next
+    `test_horizon` observations. Slides forward by `step`. Returns mean cum‑LL.
+    Folds run through run_cv_grid (n_jobs, warm_start, cache, n_iter, tol as there).
+    """
+    oos_lls = run_cv_grid(
+        df_scaled_regime,
+        [k],
+        initial_train=initial_train,
+        test_horizon=test_horizon,
+        step=step,
+        n_jobs=n_jobs,
+        warm_start=warm_start,
+        cache=cache,
+        n_iter=n_iter,
+        tol=tol
+    )[k]
     return np.mean(oos_lls)
 
 
@@ -210,21 +602,32 @@ def compute_cv_scores(
     k_max: int,
     initial_train: str,
     test_horizon: int = 12,
-    step: int = 12
+    step: int = 12,
+    n_jobs: int = 1,
+    warm_start: bool = False,
+    on_result=None,
+    cache: FitCache | None = None,
+    n_iter: int = HMM_N_ITER,
+    tol: float = HMM_TOL
 ) -> dict[int, float]:
     """
     Compute rolling-window CV OOS cumulative LL for k in [k_min..k_max].
+    The whole (k, fold) grid is scheduled at once by run_cv_grid.
     """
-    return {
-        k: rolling_oos_ll(
-            df_scaled_regime,
-            k,
-            initial_train=initial_train,
-            test_horizon=test_horizon,
-            step=step
-        )
-        for k in range(k_min, k_max + 1)
-    }
+    fold_lls = run_cv_grid(
+        df_scaled_regime,
+        list(range(k_min, k_max + 1)),
+        initial_train=initial_train,
+        test_horizon=test_horizon,
+        step=step,
+        n_jobs=n_jobs,
+        warm_start=warm_start,
+        on_result=on_result,
+        cache=cache,
+        n_iter=n_iter,
+        tol=tol
+    )
+    return {k: np.mean(lls) for k, lls in fold_lls.items()}
 
 
 def select_best_k_cv(cv_scores: dict[int, float]) -> int:
@@ -7,6 +7,7 @@ from statsmodels.tsa.stattools import adfuller
 from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
 from matplotlib.cm import get_cmap
 from models.embedding.R2PCA import R2PCA_I
+from r2pca_utils import RollingPCAEngine, top_k_eigh, LoadingsStore
 
 __all__ = [
     "compute_full_sample_r2pca", "determine_fixed_k", "plot_scree",  
@@ -61,11 +62,19 @@ def audit_metadata_coverage(
 def compute_full_sample_r2pca(
     df: pd.DataFrame,
     pct_variance: float = 0.75,
-    hierarchical: bool = False
+    hierarchical: bool = False,
+    solver: str = "r2pca",
+    n_components: int = 20
 ) -> tuple[R2PCA_I, np.ndarray, float, np.ndarray]:
     """
     Fit full-sample R2-PCA to df, return model, eigenvalues, total variance, and explained ratios.
+    solver="lanczos"/"randomized": plain-PCA top n_components eigenvalues only (r2pca_utils.top_k_eigh),
+    total variance from the trace; model is then None.
     """
+    if solver != "r2pca":
+        eigs, _, total_var = top_k_eigh(df.to_numpy(dtype=float), n_components, solver)
+        return None, eigs, total_var, eigs / total_var
+
     model = R2PCA_I(pct_variance=pct_variance, hierarchical=hierarchical)
     model.fit(df, curr_names=list(df.columns))
     eigs = np.real(model.val)
@@ -129,35 +138,26 @@ def rolling_r2pca(
     df: pd.DataFrame,
     K: int,
     window_size: int = 12,
-    hierarchical: bool = False
+    hierarchical: bool = False,
+    method: str = "refit",
+    eig_solver: str = "exact",
+    n_jobs: int = 1,
+    loadings_store: bool = False,
+    loadings_path: str | None = None,
+    align: bool = False
 ) -> tuple[pd.DataFrame, list[np.ndarray], list[float]]:
     """
-    Perform rolling-window R2-PCA and return pc_ts, loadings list, and cumvar list.
+    Perform rolling-window R2-PCA and return pc_ts, loadings list, and cumvar list
+    (plain-PCA top-K variance share per window), via r2pca_utils.RollingPCAEngine.
+    ±inf is treated as missing; windows with missing values are skipped.
+    method="incremental" uses the sliding-covariance engine and n_jobs > 1 the process-parallel
+    refit, loadings_store/loadings_path a LoadingsStore instead of the list, align sign/order-aligned
+    PCs across windows; see r2pca_utils.rolling_r2pca.
     """
-    dates = df.index[window_size:]
-    scores, loadings_all, cumvars = [], [], []
-    score_dates = []
-    for dt in dates:
-        win = df.loc[:dt].iloc[-window_size:].copy()
-        win.replace([np.inf, -np.inf], np.nan, inplace=True)
-        win.ffill().bfill(inplace=True)
-        if win.isna().any().any():
-            continue
-        mdl = R2PCA_I(n_components=K, pct_variance=None, hierarchical=hierarchical)
-        mdl.fit(win, curr_names=list(win.columns))
-        Xr = mdl.transform(win)
-        if Xr.ndim == 3:
-            Xr = Xr[:, :, 0]
-        scores.append(Xr[-1, :K])
-        loadings_all.append(mdl.prev_eigenvectors_[:K, :])
-        score_dates.append(dt)
-        cov = np.cov(win.values, rowvar=False)
-        eigs = np.sort(np.linalg.eigvalsh(cov))[::-1]
-        cumvars.append(eigs[:K].sum() / eigs.sum())
-    pc_ts = pd.DataFrame(
-        scores, index=score_dates, columns=[f"PC{i+1}" for i in range(K)]
-    )
-    return pc_ts, loadings_all, cumvars
+    engine = RollingPCAEngine(K, window_size, hierarchical, method, eig_solver, n_jobs,
+                              outputs=("scores", "loadings", "variance"), loadings_store=loadings_store,
+                              loadings_path=loadings_path, align=align).fit(df)
+    return engine.scores_, engine.loadings_, engine.eig_cumvar_
 
 
 def plot_rolling_pc_scores(
@@ -183,15 +183,18 @@ def plot_rolling_pc_scores(
 
 
 def select_top_indicators(
-    loadings_all: list[np.ndarray],
+    loadings_all: list[np.ndarray] | LoadingsStore,
     columns: list[str],
     top_n: int = 8
 ) -> tuple[pd.DataFrame, list[str]]:
     """
     Compute avg absolute loading over windows and return sorted DataFrame and top_n list.
     """
-    L = np.stack(loadings_all)
-    avgL = np.mean(np.abs(L), axis=(0,1))
+    if isinstance(loadings_all, LoadingsStore):
+        avgL = loadings_all.mean_abs()
+    else:
+        L = np.stack(loadings_all)
+        avgL = np.mean(np.abs(L), axis=(0,1))
     df = pd.DataFrame({"Indicator": columns, "AvgAbsLoading": avgL})
     df = df.sort_values("AvgAbsLoading", ascending=False).reset_index(drop=True)
     return df, df.Indicator.iloc[:top_n].tolist()
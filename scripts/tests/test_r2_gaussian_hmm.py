@@ -0,0 +1,196 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy.stats import multivariate_normal
+
+# external dependencies of r2_gaussian_hmm that are not part of this repo
+pytest.importorskip("models.clustering.r2kmeans")
+pytest.importorskip("models.HMMs.base_hmm")
+from r2_gaussian_hmm import R2GaussianHMM, RegimeParams, RegimeSnapshotArchive
+
+
+def fit_two_state(covariance_type="diag", seed=0, **kwargs):
+    rng = np.random.default_rng(seed)
+    X = np.vstack([rng.normal(0.0, 1.0, (150, 4)), rng.normal(3.0, 0.5, (150, 4))])
+    kwargs.setdefault("n_components", 2)
+    model = R2GaussianHMM(covariance_type=covariance_type, **kwargs)
+    model.fit(X)
+    return model, X
+
+
+def outlier_segment(model, X):
+    """
+    Scaled segment ending on a far outlier; returns it with the state whose emission dominates
+    the outlier (by far more than exp underflows, ~745 nats).
+    """
+    X_ = model.scaler.transform(X)
+    means = model.model.means_
+    outlier = means[0] + 60 * (means[0] - means[1])
+    framelogprob = model.frame_log_likelihood(outlier[None])[0]
+    best = int(np.argmax(framelogprob))
+    assert framelogprob[best] - framelogprob[1 - best] > 745
+    return np.vstack([X_[:3], outlier, X_[-2:]]), best
+
+
+def random_regimes(n_regimes, n_features, diag, seed):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(n_regimes, n_features))
+    if diag:
+        covars = rng.uniform(0.5, 2.0, (n_regimes, n_features))
+    else:
+        A = rng.normal(size=(n_regimes, n_features, n_features))
+        covars = A @ A.transpose(0, 2, 1) + np.eye(n_features)
+    return RegimeParams(means, covars)
+
+
+def prefix_scores(model, X_):
+    return np.array([model.model.score(X_[:i]) for i in range(1, len(X_) + 1)])
+
+
+@pytest.mark.parametrize("covariance_type", ["diag", "full"])
+def test_forward_pass_zero_start_probability(covariance_type):
+    model, X = fit_two_state(covariance_type)
+    seg, best = outlier_segment(model, X)
+    # start on the outlier, in the state that cannot explain it
+    seg = seg[3:]
+    model.model.startprob_ = np.eye(2)[1 - best]
+
+    cum_ll = np.cumsum(model.score_observations(seg)[1])
+    assert np.all(np.isfinite(cum_ll))
+    np.testing.assert_allclose(cum_ll, prefix_scores(model, seg), rtol=1e-10)
+
+
+@pytest.mark.parametrize("covariance_type", ["diag", "full"])
+def test_forward_pass_zero_transition_probability(covariance_type):
+    model, X = fit_two_state(covariance_type)
+    seg, best = outlier_segment(model, X)
+    # the chain starts in the other state, which is absorbing, so the best state is unreachable
+    other = 1 - best
+    model.model.startprob_ = np.eye(2)[other]
+    transmat = np.full((2, 2), 0.5)
+    transmat[other] = np.eye(2)[other]
+    model.model.transmat_ = transmat
+
+    cum_ll = np.cumsum(model.score_observations(seg)[1])
+    assert np.all(np.isfinite(cum_ll))
+    np.testing.assert_allclose(cum_ll, prefix_scores(model, seg), rtol=1e-10)
+    if covariance_type == "full":
+        probs = model.transform(model.scaler.inverse_transform(seg))
+        np.testing.assert_allclose(probs, model.model.predict_proba(seg), atol=1e-10)
+
+
+def test_partial_fit_through_unreachable_state_stays_finite():
+    model, X = fit_two_state("full", incremental=True, partial_n_iter=1)
+    seg, best = outlier_segment(model, X)
+    other = 1 - best
+    # make the other state absorbing in the running statistics and the filter sit in it
+    trans = model.inc_stats["trans"]
+    trans[other] = np.eye(2)[other] * trans[other].sum()
+    model.inc_fwd = np.eye(2)[other]
+
+    probs = model.partial_fit(model.scaler.inverse_transform(seg[3:]))
+    assert np.all(np.isfinite(probs))
+    assert np.all(np.isfinite(model.model.means_))
+    assert np.all(np.isfinite(model.model.transmat_))
+
+
+@pytest.mark.parametrize("covariance_type", ["diag", "full"])
+def test_regime_filter_update_through_unreachable_state(covariance_type):
+    model, X = fit_two_state(covariance_type)
+    seg, best = outlier_segment(model, X)
+    other = 1 - best
+    model.model.startprob_ = np.eye(2)[other]
+    transmat = np.full((2, 2), 0.5)
+    transmat[other] = np.eye(2)[other]
+    model.model.transmat_ = transmat
+
+    regime_filter = model.regime_filter()
+    cum_ll = []
+    for x in model.scaler.inverse_transform(seg):
+        probs = regime_filter.update(x)
+        assert np.isfinite(list(probs.values())).all()
+        cum_ll.append(regime_filter.log_likelihood)
+    np.testing.assert_allclose(cum_ll, prefix_scores(model, seg), rtol=1e-8)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_low_memory_fit_on_sequence_list(dtype):
+    rng = np.random.default_rng(2)
+    A = rng.normal(0.0, 1.0, (120, 4))
+    B = rng.normal(3.0, 0.5, (100, 4))
+    A_before, B_before = A.copy(), B.copy()
+
+    model = R2GaussianHMM(n_components=2, low_memory=True, dtype=dtype)
+    model.fit([A, B])
+    np.testing.assert_array_equal(model.sequence_lengths_, [120, 100])
+    assert model.model.means_.shape == (2, 4)
+    np.testing.assert_array_equal(A, A_before)
+    np.testing.assert_array_equal(B, B_before)
+
+
+def test_restarts_keep_the_stable_cluster_model():
+    # three states on two-cluster data: the restarts disagree and restart 0 does not win
+    model, X = fit_two_state(n_components=3, n_init=4)
+    assert np.argmax(model.restart_log_likelihoods_) != 0
+    assert model.cluster_model.stable_init
+    means = model.model.means_.copy()
+    # a cold refit on the same data starts from the same stable clustering
+    model.fit(X)
+    np.testing.assert_allclose(model.model.means_, means)
+
+
+def test_partial_fit_rejects_zero_iterations():
+    model, X = fit_two_state(incremental=True)
+    means = model.model.means_.copy()
+    with pytest.raises(ValueError, match="n_iter"):
+        model.partial_fit(X[-1:], n_iter=0)
+    np.testing.assert_array_equal(model.model.means_, means)
+
+
+def test_incremental_fit_rejects_several_sequences_before_refitting():
+    model, X = fit_two_state(incremental=True)
+    means, scale = model.model.means_.copy(), model.scaler.scale_.copy()
+    with pytest.raises(ValueError, match="single sequence"):
+        model.fit([X[:100], X[100:]])
+    assert model.sequence_lengths_ is None
+    np.testing.assert_array_equal(model.model.means_, means)
+    np.testing.assert_array_equal(model.scaler.scale_, scale)
+
+
+def test_lsa_assignment_is_optimal():
+    model = R2GaussianHMM(n_components=4)
+    cost = np.random.default_rng(3).uniform(size=(4, 5))
+    best = min(itertools.permutations(range(5), 4), key=lambda cols: (cost[range(4), cols] ** 2).sum())
+    np.testing.assert_array_equal(model.solve_assignment_lsa(cost), np.eye(5)[list(best)])
+
+
+def test_lsa_assignment_matches_scip():
+    cp = pytest.importorskip("cvxpy")
+    if "SCIP" not in cp.installed_solvers():
+        pytest.skip("cvxpy has no SCIP solver")
+    model = R2GaussianHMM(n_components=4)
+    cost = np.random.default_rng(3).uniform(size=(4, 5))
+    np.testing.assert_array_equal(model.solve_assignment_lsa(cost), np.round(model.solve_assignment_scip(cost)))
+
+
+@pytest.mark.parametrize("diag", [True, False])
+def test_mixed_cost_matrix_matches_pairwise_costs(diag):
+    model = R2GaussianHMM(n_components=3)
+    past, new = random_regimes(3, 4, diag, seed=0), random_regimes(4, 4, diag, seed=1)
+    expected = [[model.pair_assignment_cost(multivariate_normal(m1, c1), multivariate_normal(m2, c2))
+                 for m2, c2 in zip(new.means, new.full_covars())]
+                for m1, c1 in zip(past.means, past.full_covars())]
+    np.testing.assert_allclose(model.get_cost_matrix(past, new, metric="mixed"), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("covariance_type", ["diag", "full"])
+def test_snapshot_archive_round_trip(covariance_type, tmp_path):
+    models = [fit_two_state(covariance_type, seed=seed)[0] for seed in (0, 1)]
+    X = np.random.default_rng(5).normal(1.5, 2.0, (40, 4))
+    archive = RegimeSnapshotArchive.write(str(tmp_path / "snapshots"), [m.to_arrays() for m in models],
+                                          keys=["2020-01-31", "2020-02-29"])
+    assert len(archive) == 2 and archive.covariance_type == covariance_type
+    for pos, model in enumerate(models):
+        np.testing.assert_allclose(archive[pos].transform(X), model.transform(X), rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(archive.loc("2020-02-29").transform(X), models[1].transform(X), rtol=1e-12, atol=1e-15)
@@ -0,0 +1,109 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# external dependency of r2pca_utils that is not part of this repo
+pytest.importorskip("models.embedding.R2PCA")
+from r2pca_utils import (BasisAligner, LoadingsStore, RollingPCAEngine, _rolling_pca_incremental, batched_eigs,
+                         rolling_r2pca, valid_window_ends)
+
+
+def indicator_panel(n=200, d=6, seed=0):
+    """Correlated monthly indicators with a NaN and an inf, each knocking out a run of windows."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3)) @ rng.normal(size=(3, d)) + 0.3 * rng.normal(size=(n, d))
+    X[50, 2] = np.nan
+    X[120, 4] = np.inf
+    return pd.DataFrame(X, index=pd.date_range("2000-01-31", periods=n, freq="ME"))
+
+
+@pytest.mark.parametrize("n_features, window_size", [(40, 24), (10, 60)])
+def test_batched_eigs_stays_within_memory_budget(n_features, window_size):
+    values = np.random.default_rng(0).normal(size=(3000, n_features))
+    budget = 4 * 2**20
+    tracemalloc.start()
+    try:
+        eigs = batched_eigs(values, window_size, memory_budget=budget)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak - eigs.nbytes <= 1.05 * budget
+
+    for end in range(window_size - 1, len(values), 97):
+        window = values[end - window_size + 1:end + 1]
+        expected = np.linalg.eigvalsh(np.cov(window.T))[::-1][:eigs.shape[1]]
+        np.testing.assert_allclose(eigs[end - window_size + 1], expected, atol=1e-12)
+
+
+def test_rolling_r2pca_is_identical_across_n_jobs():
+    df = indicator_panel()
+    serial = rolling_r2pca(df, 3, window_size=12, n_jobs=1)
+    parallel = rolling_r2pca(df, 3, window_size=12, n_jobs=3)
+
+    pc_ts = serial[0]
+    assert not pc_ts.index.isin(df.index[50:62]).any()
+    assert not pc_ts.index.isin(df.index[120:132]).any()
+    pd.testing.assert_frame_equal(parallel[0], pc_ts, check_exact=True)
+    np.testing.assert_array_equal(np.stack(parallel[1]), np.stack(serial[1]))
+    assert parallel[2] == serial[2]
+    assert parallel[3] == serial[3]
+
+
+@pytest.mark.parametrize("refresh_every", [7, 250])
+def test_incremental_pca_matches_exact_pca_per_window(refresh_every):
+    df = indicator_panel()
+    values = df.to_numpy(copy=True)
+    values[np.isinf(values)] = np.nan
+    K, window_size = 3, 24
+    window_ends = valid_window_ends(values, window_size)
+    # the run restarts after the NaN-skipped windows and crosses refresh boundaries
+    assert np.any(np.diff(window_ends) > 1)
+
+    scores, loadings_all, cumvars = _rolling_pca_incremental(
+        values, window_ends, K, window_size, refresh_every=refresh_every)
+    for end, score, loadings, cumvar in zip(window_ends, scores, loadings_all, cumvars):
+        window = values[end - window_size + 1:end + 1]
+        eigvals, eigvecs = np.linalg.eigh(np.cov(window.T))
+        eigvals, eigvecs = eigvals[::-1], eigvecs[:, ::-1][:, :K]
+        signs = np.sign(np.sum(eigvecs.T * loadings, axis=1))
+        np.testing.assert_allclose(cumvar, eigvals[:K].sum() / eigvals.sum(), atol=1e-12)
+        np.testing.assert_allclose(signs[:, None] * loadings, eigvecs.T, atol=1e-6)
+        np.testing.assert_allclose(signs * score, (window[-1] - window.mean(axis=0)) @ eigvecs, atol=1e-6)
+
+
+def test_basis_aligner_undoes_sign_flip_and_pc_swap():
+    rng = np.random.default_rng(1)
+    loadings = np.linalg.qr(rng.normal(size=(6, 3)))[0].T
+    # next window: PC1 and PC2 swapped, PC3 flipped, slightly rotated
+    perturbed = np.linalg.qr((loadings + 0.01 * rng.normal(size=(3, 6))).T)[0].T
+    swapped = perturbed[[1, 0, 2]] * np.array([1.0, 1.0, -1.0])[:, None]
+    scores = np.array([[1.0, 2.0, 3.0], [2.0, 1.0, -3.0]])
+
+    aligner = BasisAligner([])
+    aligner.append(loadings)
+    aligner.append(swapped)
+    aligned = aligner.result()
+    np.testing.assert_allclose(aligned[1], perturbed)
+    np.testing.assert_allclose(aligner.apply_scores(scores), [[1.0, 2.0, 3.0], [1.0, 2.0, 3.0]])
+    assert np.isnan(aligner.overlap[0]) and aligner.overlap[1] > 0.99
+
+
+def test_engine_exposes_window_overlap():
+    df = indicator_panel()
+    engine = RollingPCAEngine(3, window_size=24, align=True).fit(df)
+    assert engine.overlap_.index.equals(engine.scores_.index)
+    assert engine.scores_.attrs["overlap"] is engine.overlap_
+    assert np.isnan(engine.overlap_.iloc[0]) and (engine.overlap_.iloc[1:] <= 1 + 1e-12).all()
+    assert RollingPCAEngine(3, window_size=24).fit(df).overlap_ is None
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_loadings_store_mean_abs_matches_stacked_list(on_disk, tmp_path):
+    loadings = list(np.random.default_rng(2).normal(size=(10, 3, 6)))
+    store = LoadingsStore(10, 3, 6, path=str(tmp_path / "loadings.npy") if on_disk else None)
+    for window in loadings:
+        store.append(window)
+    np.testing.assert_allclose(store.mean_abs(), np.abs(np.stack(loadings)).mean((0, 1)), rtol=1e-12)
+    np.testing.assert_allclose(np.stack(store), np.stack(loadings), rtol=1e-6)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("models.clustering.r2kmeans")
+pytest.importorskip("models.HMMs.base_hmm")
+from r2rd_utils import FitCache, compute_bic_scores, compute_cv_scores, warm_start_hmm
+
+
+def regime_panel(n=200, d=5, seed=0):
+    rng = np.random.default_rng(seed)
+    states = np.zeros(n, dtype=int)
+    for t in range(1, n):
+        states[t] = states[t - 1] if rng.random() < 0.93 else rng.integers(3)
+    means = rng.normal(0.0, 1.5, (3, d))
+    X = means[states] + rng.normal(size=(n, d))
+    return pd.DataFrame(X, index=pd.date_range("2000-01-31", periods=n, freq="ME"))
+
+
+def test_warm_start_cv_scores_are_reproducible():
+    df = regime_panel()
+    kwargs = dict(k_min=2, k_max=3, initial_train="2005-01-31", test_horizon=12, step=6, warm_start=True)
+    serial = compute_cv_scores(df, **kwargs)
+    assert compute_cv_scores(df, **kwargs) == serial
+    assert compute_cv_scores(df, n_jobs=2, **kwargs) == serial
+
+
+def test_fit_cache_is_shared_across_entry_points():
+    df = regime_panel(120)
+    expected, _ = warm_start_hmm(df, 2, start_length=60)
+
+    cache = FitCache()
+    compute_bic_scores(df, "2006-12-31", 2, 3, cache=cache)
+    compute_cv_scores(df, 2, 3, initial_train="2006-12-31", test_horizon=12, step=12, cache=cache)
+    probs, _ = warm_start_hmm(df, 2, start_length=60, cache=cache)
+    assert [(rec["step"], rec["hits"]) for rec in cache.reports] == [("BIC", 0), ("CV", 2), ("warm_start_hmm", 2)]
+    pd.testing.assert_frame_equal(probs, expected)
+
+    probs, _ = warm_start_hmm(df, 2, start_length=60, cache=cache)
+    assert cache.reports[-1]["misses"] == 0
+    pd.testing.assert_frame_equal(probs, expected)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+# xaiR2_utils pulls in the XAI stack and the external models package at import time
+for module in ("seaborn", "shap", "lightgbm", "IPython", "models.embedding.R2PCA",
+               "models.clustering.r2kmeans", "models.HMMs.base_hmm"):
+    pytest.importorskip(module)
+from r2_gaussian_hmm import R2GaussianHMM
+from xaiR2_utils import compute_cumulative_ll
+
+
+def test_compute_cumulative_ll_matches_prefix_scores():
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(0.0, 1.0, (150, 4)), rng.normal(3.0, 0.5, (150, 4))])
+    model1 = R2GaussianHMM(n_components=1)
+    model1.fit(X)
+    modelk = R2GaussianHMM(n_components=2)
+    modelk.fit(X)
+
+    # one extreme test observation, far likelier under a state the chain cannot start in
+    means = modelk.model.means_
+    outlier = means[0] + 60 * (means[0] - means[1])
+    best = int(np.argmax(modelk.frame_log_likelihood(outlier[None])[0]))
+    modelk.model.startprob_ = np.eye(2)[1 - best]
+    data = np.vstack([outlier, modelk.scaler.transform(X[-5:])])
+
+    cum_ll = compute_cumulative_ll([model1, modelk], data)
+    expected = np.array([[m.model.score(data[:i]) for m in (model1, modelk)] for i in range(1, len(data) + 1)])
+    assert np.all(np.isfinite(cum_ll))
+    np.testing.assert_allclose(cum_ll, expected, rtol=1e-10)
@@ -31,6 +31,7 @@ __all__ = [
     "compute_sensitivity_dfs",
     "plot_sensitivity_dfs",
     # Step 3.4 robust
+    "compute_cumulative_ll",
     "validate_hmm",
     # Step 3.5
     "plot_transition_matrix",
@@ -50,10 +51,11 @@ __all__ = [
     "rolling_explainers"
 ]
 
-def compute_state_stats(final_regime_model, selected_indicators):
+def compute_state_stats(final_regime_model, selected_indicators, return_corr=False):
     """
     Extract state-specific means and variances from the fitted HMM model.
-    Returns (means_df, vars_df).
+    Returns (means_df, vars_df), plus {regime label: correlation DataFrame} with return_corr
+    (only informative for full/tied covariance models).
     """
     # 1) Pull out the learned Gaussian means and covariances
     means_array = final_regime_model.model.means_            # shape: (n_states, n_features)
@@ -80,7 +82,17 @@ def compute_state_stats(final_regime_model, selected_indicators):
             index=state_labels,
             columns=selected_indicators
         )
-    return means_df, vars_df
+    if not return_corr:
+        return means_df, vars_df
+
+    full_covars = covars if covars.ndim == 3 else np.einsum("ki,ij->kij", covars, np.eye(covars.shape[1]))
+    std = np.sqrt(np.diagonal(full_covars, axis1=1, axis2=2))
+    corr = {
+        label: pd.DataFrame(full_covars[i] / np.outer(std[i], std[i]),
+                            index=selected_indicators, columns=selected_indicators)
+        for i, label in enumerate(state_labels)
+    }
+    return means_df, vars_df, corr
 
 def display_state_stats(means_df, vars_df):
     """
@@ -246,6 +258,15 @@ def plot_sensitivity_dfs(sensitivity_dfs, figsize=(14, 4), cmap="vlag", annot_kw
     plt.show()
 
 
+def compute_cumulative_ll(models, data):
+    """
+    Prefix log-likelihood curves of several fitted R2GaussianHMMs.
+    Column j holds [models[j].model.score(data[:i]) for i in 1..T], taken from the
+    scaling constants of a single forward pass per model. Returns an array (T, N).
+    """
+    return np.column_stack([np.cumsum(m.score_observations(data)[1]) for m in models])
+
+
 def validate_hmm(training_data, best_k, df_scaled_regime, df_probs, test_start='2011-01-01'):
     """
     Perform Vuong test, AIC/BIC, out-of-sample LL back-test,
@@ -258,8 +279,8 @@ def validate_hmm(training_data, best_k, df_scaled_regime, df_probs, test_start='
     modelk = R2GaussianHMM(n_components=best_k, n_iter=1000, tol=1e-5)
     modelk.fit(training_data)
     # Vuong test
-    lp1 = np.array([model1.model.score(x.reshape(1,-1)) for x in training_data])
-    lp2 = np.array([modelk.model.score(x.reshape(1,-1)) for x in training_data])
+    lp1 = model1.score_observations(training_data)[0]
+    lp2 = modelk.score_observations(training_data)[0]
     d_train = lp2 - lp1; N = d_train.shape[0]
     V_stat = np.sqrt(N) * d_train.mean() / d_train.std(ddof=1)
     p_val = 2 * (1 - stats.norm.cdf(abs(V_stat)))
@@ -279,10 +300,9 @@ def validate_hmm(training_data, best_k, df_scaled_regime, df_probs, test_start='
     print(f"{labelk:<12}{LLk:10.2f}{pk:6d}{AICk:10.2f}{BICk:10.2f}")
     # Out-of-sample
     test_df = df_scaled_regime.loc[test_start:]
-    cum1 = [model1.model.score(test_df.values[:i]) for i in range(1, len(test_df)+1)]
-    cumk = [modelk.model.score(test_df.values[:i]) for i in range(1, len(test_df)+1)]
+    cum = compute_cumulative_ll([model1, modelk], test_df.values)
     dates_test = test_df.index
-    cum1 = np.array(cum1); cumk = np.array(cumk); delta = cumk - cum1
+    cum1 = cum[:, 0]; cumk = cum[:, 1]; delta = cumk - cum1
     # Plot
     plt.figure(figsize=(10,4));
     plt.plot(dates_test, cum1, label="1-State HMM"); plt.plot(dates_test, cumk, label=f"{best_k}-State HMM")